@@ -0,0 +1,209 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import Date, delete, func, insert, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Collection, Optional, List, Set, Tuple
+from datetime import date, timedelta
+from decimal import Decimal
+
+from models.database import get_read_db, AsyncDB, Coupon, CouponUse, SavingsDaily, User, utcnow
+from schemas.analytics import SavingsBucket, SavingsGroupBy, SavingsPoint, SavingsResponse
+from api.auth import get_current_user_for_read
+
+router = APIRouter(prefix="/analytics", tags=["analytics"])
+
+_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+def record_savings(db: Session, coupon: Coupon, coupon_use: CouponUse) -> None:
+    """Add one redemption to the savings_daily rollup inside the caller's transaction"""
+    insert = _INSERTS.get(db.get_bind().dialect.name)
+    if insert is None:
+        return  # rollup is rebuilt by utils/backfill_savings.py on other databases
+
+    amount_saved = coupon_use.amount_saved or Decimal("0")
+    purchase_amount = coupon_use.purchase_amount or Decimal("0")
+    statement = insert(SavingsDaily).values(
+        user_id=coupon_use.user_id,
+        day=(coupon_use.used_at or utcnow()).date(),
+        store_name=coupon.store_name or "",
+        category=coupon.category or "",
+        uses=1,
+        amount_saved=amount_saved,
+        purchase_amount=purchase_amount,
+    )
+    # Atomic increment, so concurrent redemptions on the same day cannot lose updates
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id", "day", "store_name", "category"],
+        set_={
+            "uses": SavingsDaily.uses + 1,
+            "amount_saved": SavingsDaily.amount_saved + amount_saved,
+            "purchase_amount": SavingsDaily.purchase_amount + purchase_amount,
+        },
+    )
+    db.execute(statement)
+
+def oldest_retained_day(db: Session) -> Optional[date]:
+    """First day of the oldest monthly coupon_uses partition (PostgreSQL), or None if not partitioned.
+
+    Older months were archived and dropped by utils/coupon_use_partitions.py, so
+    savings_daily is all that is left of their redemptions.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    oldest = db.execute(text(
+        "SELECT min(c.relname) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'coupon_uses' AND c.relname ~ '^coupon_uses_p[0-9]{4}_[0-9]{2}$'"
+    )).scalar()
+    if oldest is None:
+        return None
+    year, month = oldest.removeprefix("coupon_uses_p").split("_")
+    return date(int(year), int(month), 1)
+
+def coupon_savings_days(db: Session, coupon_id: int) -> Set[Tuple[int, date]]:
+    """The (user_id, day) pairs holding a coupon's redemptions, to rebuild_savings(days=...) once they are deleted"""
+    day = func.date(CouponUse.used_at, type_=Date)
+    rows = db.query(CouponUse.user_id, day).filter(
+        CouponUse.coupon_id == coupon_id,
+        CouponUse.used_at.is_not(None)
+    ).distinct()
+    return {(user_id, used_on) for user_id, used_on in rows}
+
+def rebuild_savings(
+    db: Session,
+    user_id: Optional[int] = None,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    days: Optional[Collection[Tuple[int, date]]] = None,
+) -> int:
+    """Replace savings_daily rows (for one user / a date range / some (user_id, day) pairs) with totals recomputed from coupon_uses.
+
+    Days before oldest_retained_day are left alone: their redemptions are no longer in coupon_uses.
+    """
+    day = func.date(CouponUse.used_at, type_=Date)
+    store_name = func.coalesce(Coupon.store_name, "")
+    category = func.coalesce(Coupon.category, "")
+
+    source = (
+        select(
+            CouponUse.user_id,
+            day,
+            store_name,
+            category,
+            func.count(),
+            func.coalesce(func.sum(CouponUse.amount_saved), 0),
+            func.coalesce(func.sum(CouponUse.purchase_amount), 0),
+        )
+        .join(Coupon, Coupon.id == CouponUse.coupon_id)
+        .where(CouponUse.used_at.is_not(None))
+        .group_by(CouponUse.user_id, day, store_name, category)
+    )
+    clear = delete(SavingsDaily)
+
+    retained = oldest_retained_day(db)
+    if retained is not None and (since is None or since < retained):
+        since = retained
+    if days is not None:
+        days = [(owner, used_on) for owner, used_on in days if retained is None or used_on >= retained]
+        if not days:
+            return 0
+        source = source.where(
+            CouponUse.user_id.in_({owner for owner, _ in days}),
+            tuple_(CouponUse.user_id, day).in_(days),
+        )
+        clear = clear.where(tuple_(SavingsDaily.user_id, SavingsDaily.day).in_(days))
+        # A used_at range, so the lookup can use the coupon_uses indexes
+        since = max(since or date.min, min(used_on for _, used_on in days))
+        until = min(until or date.max, max(used_on for _, used_on in days) + timedelta(days=1))
+    if user_id is not None:
+        source = source.where(CouponUse.user_id == user_id)
+        clear = clear.where(SavingsDaily.user_id == user_id)
+    if since:
+        source = source.where(CouponUse.used_at >= since)
+        clear = clear.where(SavingsDaily.day >= since)
+    if until:
+        source = source.where(CouponUse.used_at < until)
+        clear = clear.where(SavingsDaily.day < until)
+
+    db.execute(clear)
+    result = db.execute(insert(SavingsDaily).from_select(
+        ["user_id", "day", "store_name", "category", "uses", "amount_saved", "purchase_amount"],
+        source,
+    ))
+    return result.rowcount
+
+def bucket_start(day: date, bucket: SavingsBucket) -> date:
+    if bucket == SavingsBucket.WEEK:
+        return day - timedelta(days=day.weekday())
+    if bucket == SavingsBucket.MONTH:
+        return day.replace(day=1)
+    return day
+
+class AnalyticsService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_savings(
+        self,
+        user_id: int,
+        bucket: SavingsBucket,
+        group_by: SavingsGroupBy,
+        since: Optional[date] = None,
+        until: Optional[date] = None
+    ) -> SavingsResponse:
+        key_column = {
+            SavingsGroupBy.STORE: SavingsDaily.store_name,
+            SavingsGroupBy.CATEGORY: SavingsDaily.category,
+        }.get(group_by)
+        columns = [SavingsDaily.day] + ([key_column] if key_column is not None else [])
+
+        query = self.db.query(
+            *columns,
+            func.sum(SavingsDaily.uses),
+            func.sum(SavingsDaily.amount_saved),
+            func.sum(SavingsDaily.purchase_amount),
+        ).filter(SavingsDaily.user_id == user_id)
+        if since:
+            query = query.filter(SavingsDaily.day >= since)
+        if until:
+            query = query.filter(SavingsDaily.day < until)
+
+        # At most one row per day (and store/category); weeks and months are folded here
+        totals: dict = {}
+        for row in query.group_by(*columns).all():
+            day = row[0] if isinstance(row[0], date) else date.fromisoformat(row[0])
+            key = (row[1] or None) if key_column is not None else None
+            uses, amount_saved, purchase_amount = row[-3:]
+            point = totals.setdefault((bucket_start(day, bucket), key), [0, Decimal("0"), Decimal("0")])
+            point[0] += uses or 0
+            point[1] += Decimal(amount_saved or 0)
+            point[2] += Decimal(purchase_amount or 0)
+
+        series: List[SavingsPoint] = [
+            SavingsPoint(period=period, key=key, uses=uses, amount_saved=amount_saved, purchase_amount=purchase_amount)
+            for (period, key), (uses, amount_saved, purchase_amount) in sorted(
+                totals.items(), key=lambda item: (item[0][0], item[0][1] or "")
+            )
+        ]
+        return SavingsResponse(
+            bucket=bucket,
+            group_by=group_by,
+            total_uses=sum(point.uses for point in series),
+            total_saved=sum((point.amount_saved for point in series), Decimal("0")),
+            series=series,
+        )
+
+@router.get("/savings", response_model=SavingsResponse)
+async def get_savings(
+    bucket: SavingsBucket = Query(SavingsBucket.MONTH),
+    group_by: SavingsGroupBy = Query(SavingsGroupBy.NONE),
+    since: Optional[date] = Query(None, description="First day included (UTC)"),
+    until: Optional[date] = Query(None, description="First day excluded (UTC)"),
+    current_user: User = Depends(get_current_user_for_read),
+    db: AsyncDB = Depends(get_read_db)
+):
+    """The current user's savings per day/week/month, optionally split by store or category"""
+    return await db.run(
+        lambda session: AnalyticsService(session).get_savings(current_user.id, bucket, group_by, since, until)
+    )
@@ -4,14 +4,20 @@ from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from models.database import get_db, User, RefreshToken
+from models.database import get_async_db, get_read_db, AsyncDB, SessionLocal, User, RefreshToken, utcnow
 from schemas.auth import UserCreate, UserLogin, UserResponse, Token, TokenRefresh, PasswordChange
 from core.security import SecurityManager, PasswordValidator, RateLimiter
+from core.jobs import enqueue, job
+from core.serialization import NegotiatedResponse, negotiate_format
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
-router = APIRouter(prefix="/auth", tags=["authentication"])
+# Responses are JSON, or MessagePack for clients sending Accept: application/msgpack
+router = APIRouter(
+    prefix="/auth", tags=["authentication"],
+    dependencies=[Depends(negotiate_format)], default_response_class=NegotiatedResponse
+)
 security = HTTPBearer()
 limiter = Limiter(key_func=get_remote_address)
 
@@ -21,6 +27,14 @@ class AuthService:
         self.security_manager = SecurityManager()
 
     def create_user(self, user_data: UserCreate) -> User:
+        self.ensure_user_available(user_data)
+        validate_new_password(user_data.password)
+        
+        # Create new user
+        hashed_password = self.security_manager.hash_password(user_data.password)
+        return self.add_user(user_data, hashed_password)
+
+    def ensure_user_available(self, user_data: UserCreate) -> None:
         # Check if user already exists
         existing_user = self.db.query(User).filter(
             (User.email == user_data.email) | (User.username == user_data.username)
@@ -37,18 +51,8 @@ class AuthService:
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Username already taken"
                 )
-        
-        # Validate password
-        is_valid, errors = PasswordValidator.validate(user_data.password)
-        if not is_valid:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail={"message": "Password validation failed", "errors": errors}
-            )
-        
-        # Create new user
-        hashed_password = self.security_manager.hash_password(user_data.password)
-        
+
+    def add_user(self, user_data: UserCreate, hashed_password: str) -> User:
         db_user = User(
             email=user_data.email,
             username=user_data.username.lower(),
@@ -65,7 +69,7 @@ class AuthService:
         return db_user
 
     def authenticate_user(self, email: str, password: str) -> Optional[User]:
-        user = self.db.query(User).filter(User.email == email, User.is_active == True).first()
+        user = self.get_active_user_by_email(email)
         
         if not user:
             return None
@@ -74,16 +78,36 @@ class AuthService:
             return None
         
         # Check if password needs rehashing (security parameters updated)
+        new_hash = None
         if self.security_manager.needs_rehash(user.password_hash):
-            user.password_hash = self.security_manager.hash_password(password)
-            self.db.commit()
+            new_hash = self.security_manager.hash_password(password)
+        
+        return self.record_login(user, new_hash)
+
+    def get_active_user_by_email(self, email: str) -> Optional[User]:
+        return self.db.query(User).filter(User.email == email, User.is_active == True).first()
+
+    def record_login(self, user: User, new_password_hash: Optional[str] = None) -> User:
+        if new_password_hash:
+            user.password_hash = new_password_hash
         
         # Update last login
         user.last_login = datetime.now(timezone.utc)
-        self.db.commit()
+        # Without expiring the user: login reads user.id on the event loop right after, and an
+        # expired instance would reload itself there with a blocking SELECT
+        expire_on_commit = self.db.expire_on_commit
+        self.db.expire_on_commit = False
+        try:
+            self.db.commit()
+        finally:
+            self.db.expire_on_commit = expire_on_commit
         
         return user
 
+    def set_password_hash(self, user: User, password_hash: str) -> None:
+        user.password_hash = password_hash
+        self.db.commit()
+
     def create_tokens(self, user: User) -> dict:
         access_token = self.security_manager.create_access_token(
             data={"sub": str(user.id), "username": user.username, "email": user.email}
@@ -101,6 +125,8 @@ class AuthService:
         )
         
         self.db.add(db_refresh_token)
+        # Expired and revoked tokens pile up with every login; clear them out of band
+        enqueue(self.db, "auth.purge_refresh_tokens", {"user_id": user.id}, key=f"auth.purge_refresh_tokens:{user.id}")
         self.db.commit()
         
         return {
@@ -151,18 +177,85 @@ class AuthService:
             "expires_in": 30 * 60
         }
 
+    def purge_refresh_tokens(self, user_id: int) -> int:
+        """Delete the user's expired and revoked refresh tokens"""
+        return self.db.query(RefreshToken).filter(
+            RefreshToken.user_id == user_id,
+            (RefreshToken.expires_at < utcnow()) | (RefreshToken.is_revoked == True)
+        ).delete(synchronize_session=False)
+
     def revoke_refresh_token(self, refresh_token: str):
         db_token = self.db.query(RefreshToken).filter(RefreshToken.token == refresh_token).first()
         if db_token:
             db_token.is_revoked = True
             self.db.commit()
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    token = credentials.credentials
-    
+@job("auth.purge_refresh_tokens")
+def purge_refresh_tokens_job(db: Session, payload: dict) -> None:
+    AuthService(db).purge_refresh_tokens(payload["user_id"])
+
+class AsyncAuthService:
+    """Async AuthService: ORM work runs via AsyncDB and Argon2 runs on the threadpool"""
+
+    def __init__(self, db: AsyncDB):
+        self.db = db
+        self.security_manager = SecurityManager()
+
+    async def create_user(self, user_data: UserCreate) -> User:
+        await self.db.run(lambda session: AuthService(session).ensure_user_available(user_data))
+        validate_new_password(user_data.password)
+        
+        hashed_password = await self.security_manager.hash_password_async(user_data.password)
+        return await self.db.run(lambda session: AuthService(session).add_user(user_data, hashed_password))
+
+    async def authenticate_user(self, email: str, password: str) -> Optional[User]:
+        user = await self.db.run(lambda session: AuthService(session).get_active_user_by_email(email))
+        
+        if not user:
+            return None
+        
+        if not await self.security_manager.verify_password_async(password, user.password_hash):
+            return None
+        
+        # Check if password needs rehashing (security parameters updated)
+        new_hash = None
+        if self.security_manager.needs_rehash(user.password_hash):
+            new_hash = await self.security_manager.hash_password_async(password)
+        
+        return await self.db.run(lambda session: AuthService(session).record_login(user, new_hash))
+
+    async def create_tokens(self, user: User) -> dict:
+        return await self.db.run(lambda session: AuthService(session).create_tokens(user))
+
+    async def refresh_access_token(self, refresh_token: str) -> dict:
+        return await self.db.run(lambda session: AuthService(session).refresh_access_token(refresh_token))
+
+    async def revoke_refresh_token(self, refresh_token: str):
+        await self.db.run(lambda session: AuthService(session).revoke_refresh_token(refresh_token))
+
+    async def change_password(self, user: User, password_data: PasswordChange):
+        # Verify current password
+        if not await self.security_manager.verify_password_async(password_data.current_password, user.password_hash):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Current password is incorrect"
+            )
+        
+        validate_new_password(password_data.new_password)
+        
+        # Update password
+        password_hash = await self.security_manager.hash_password_async(password_data.new_password)
+        await self.db.run(lambda session: AuthService(session).set_password_hash(user, password_hash))
+
+def validate_new_password(password: str) -> None:
+    is_valid, errors = PasswordValidator.validate(password)
+    if not is_valid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "Password validation failed", "errors": errors}
+        )
+
+def _user_from_token(db: Session, token: str) -> User:
     payload = SecurityManager.verify_token(token)
     if not payload or payload.get("type") != "access":
         raise HTTPException(
@@ -187,6 +280,21 @@ def get_current_user(
     
     return user
 
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncDB = Depends(get_async_db)
+) -> User:
+    user = await db.run(_user_from_token, credentials.credentials)
+    db.user_id = user.id
+    return user
+
+async def get_current_user_for_read(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncDB = Depends(get_read_db)
+) -> User:
+    """get_current_user for read-only routes, sharing the route's replica session"""
+    return await db.run(_user_from_token, credentials.credentials)
+
 def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
     if not current_user.is_admin:
         raise HTTPException(
@@ -195,44 +303,65 @@ def get_current_admin_user(current_user: User = Depends(get_current_user)) -> Us
         )
     return current_user
 
+def user_from_token(token: str) -> User:
+    """Resolve a bearer token with a short-lived session, for responses that stay open (event streams)"""
+    db = SessionLocal()
+    try:
+        return _user_from_token(db, token)
+    finally:
+        db.close()
+
+def is_admin_token(token: str) -> bool:
+    """Check a bearer token the way get_current_user/get_current_admin_user do, outside of a route"""
+    db = SessionLocal()
+    try:
+        get_current_admin_user(_user_from_token(db, token))
+        return True
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
 # Routes
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 @limiter.limit("5/minute")
-async def register(request: Request, user_data: UserCreate, db: Session = Depends(get_db)):
-    auth_service = AuthService(db)
-    user = auth_service.create_user(user_data)
+async def register(request: Request, user_data: UserCreate, db: AsyncDB = Depends(get_async_db)):
+    auth_service = AsyncAuthService(db)
+    user = await auth_service.create_user(user_data)
     return user
 
 @router.post("/login", response_model=Token)
 @limiter.limit("10/minute")
-async def login(request: Request, credentials: UserLogin, db: Session = Depends(get_db)):
-    auth_service = AuthService(db)
+async def login(request: Request, credentials: UserLogin, db: AsyncDB = Depends(get_async_db)):
+    auth_service = AsyncAuthService(db)
     
-    user = auth_service.authenticate_user(credentials.email, credentials.password)
+    user = await auth_service.authenticate_user(credentials.email, credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
         )
     
-    tokens = auth_service.create_tokens(user)
+    # Reads right after login (e.g. a just-registered user) go to the primary
+    db.user_id = user.id
+    tokens = await auth_service.create_tokens(user)
     return tokens
 
 @router.post("/refresh", response_model=dict)
 @limiter.limit("20/minute")
-async def refresh_token(request: Request, token_data: TokenRefresh, db: Session = Depends(get_db)):
-    auth_service = AuthService(db)
-    return auth_service.refresh_access_token(token_data.refresh_token)
+async def refresh_token(request: Request, token_data: TokenRefresh, db: AsyncDB = Depends(get_async_db)):
+    auth_service = AsyncAuthService(db)
+    return await auth_service.refresh_access_token(token_data.refresh_token)
 
 @router.post("/logout")
 async def logout(
     request: Request,
     token_data: TokenRefresh,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncDB = Depends(get_async_db)
 ):
-    auth_service = AuthService(db)
-    auth_service.revoke_refresh_token(token_data.refresh_token)
+    auth_service = AsyncAuthService(db)
+    await auth_service.revoke_refresh_token(token_data.refresh_token)
     return {"message": "Successfully logged out"}
 
 @router.get("/me", response_model=UserResponse)
@@ -245,25 +374,9 @@ async def change_password(
     request: Request,
     password_data: PasswordChange,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncDB = Depends(get_async_db)
 ):
-    # Verify current password
-    if not SecurityManager.verify_password(password_data.current_password, current_user.password_hash):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Current password is incorrect"
-        )
-    
-    # Validate new password
-    is_valid, errors = PasswordValidator.validate(password_data.new_password)
-    if not is_valid:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail={"message": "Password validation failed", "errors": errors}
-        )
-    
-    # Update password
-    current_user.password_hash = SecurityManager.hash_password(password_data.new_password)
-    db.commit()
+    auth_service = AsyncAuthService(db)
+    await auth_service.change_password(current_user, password_data)
     
     return {"message": "Password changed successfully"}
\ No newline at end of file
@@ -1,49 +1,228 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, and_, func, desc
-from typing import Optional, List
-from datetime import datetime, timezone
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session, joinedload, load_only
+from sqlalchemy import or_, and_, case, func, desc, tuple_, select, update, literal, literal_column, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import Any, Dict, Optional, List, Sequence, Union
+from datetime import datetime, timedelta, timezone
+import asyncio
+import base64
+import binascii
 import json
+import os
 
-from models.database import get_db, Coupon, User, CouponUse
+from models.database import get_async_db, get_read_db, AsyncDB, Coupon, CouponTombstone, User, CouponUse, utcnow, change_seq_source
 from schemas.coupon import (
     CouponCreate, CouponUpdate, CouponResponse, CouponSearchFilter, 
-    PaginatedCouponsResponse, CouponUseCreate, CouponUseResponse,
+    PaginatedCouponsResponse, PartialCouponResponse, PaginatedPartialCouponsResponse,
+    CouponView, COMPACT_COUPON_FIELDS, ConflictMode, CouponUseCreate, CouponUseResponse,
+    PaginatedCouponUsesResponse, BestCouponRequest, BestCouponResponse, RankedCoupon,
+    QuoteRequest, MultiQuoteRequest, QuoteResponse, CouponQuote, CouponSyncResponse,
+    CouponBatchRequest, CouponBatchResponse,
     CouponStatus, DiscountType
 )
-from api.auth import get_current_user
+from api.auth import get_current_user, get_current_user_for_read, user_from_token
+from api.analytics import coupon_savings_days, rebuild_savings, record_savings
+from core.discounts import CENT, CouponColumns, calculate_savings, quote_savings, rank_by_savings
+from core.events import EventBroker, RESYNC, format_event
+from core.jobs import enqueue, job
+from core.serialization import NegotiatedResponse, negotiate_format
+from core.singleflight import SingleFlight
 
-router = APIRouter(prefix="/coupons", tags=["coupons"])
+# Responses are JSON, or MessagePack for clients sending Accept: application/msgpack
+router = APIRouter(
+    prefix="/coupons", tags=["coupons"],
+    dependencies=[Depends(negotiate_format)], default_response_class=NegotiatedResponse
+)
+uses_router = APIRouter(
+    prefix="/uses", tags=["coupons"],
+    dependencies=[Depends(negotiate_format)], default_response_class=NegotiatedResponse
+)
+optional_bearer = HTTPBearer(auto_error=False)
+
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+event_broker = EventBroker(
+    queue_size=int(os.getenv("EVENTS_QUEUE_SIZE", "100")),
+    max_streams_per_user=int(os.getenv("EVENTS_MAX_STREAMS_PER_USER", "5")),
+    redis_url=os.getenv("REDIS_URL") or None
+)
+
+EXPIRE_BATCH_SIZE = 1000
+_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+# Ids fit in a URL up to here; POST /coupons/batch takes up to CouponBatchRequest's limit
+BATCH_GET_MAX_IDS = 100
+
+# Identical GET /coupons requests in flight at the same time share one set of queries
+COUPON_SEARCH_COALESCING = os.getenv("COUPON_SEARCH_COALESCING", "true").lower() == "true"
+coupon_searches: SingleFlight[Dict[str, Any]] = SingleFlight("coupon_search")
+# A write must not be answered by a search that started before it
+event_broker.add_listener(lambda user_id, event, data: coupon_searches.forget(lambda key: key[0] == user_id))
+
+# Columns a calculated field is derived from; any other field is a column of its own
+CALCULATED_FIELD_COLUMNS = {
+    "tags": ("tags",),
+    "remaining_uses": ("usage_limit", "usage_count"),
+    "can_use": ("status", "expiration_date", "start_date", "usage_limit", "usage_count", "per_user_limit"),
+}
+COUPON_FIELDS = tuple(CouponResponse.model_fields)
+COUPON_USE_FIELDS = tuple(CouponUseResponse.model_fields)
+
+def resolve_coupon_fields(fields: Optional[str], view: Optional[CouponView]) -> Optional[tuple]:
+    """Sorted field names asked for with ``fields=`` or ``view=``; None for the full representation"""
+    if fields is not None and view is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use either fields or view, not both"
+        )
+    if fields is not None:
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - PartialCouponResponse.model_fields.keys()
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown coupon fields: {', '.join(sorted(unknown))}"
+            )
+    elif view == CouponView.COMPACT:
+        requested = set(COMPACT_COUPON_FIELDS)
+    else:
+        return None
+    return tuple(sorted(requested | {"id"}))
+
+def coupon_columns(fields: Sequence[str]) -> List:
+    """Coupon columns needed to build ``fields``"""
+    names = set()
+    for field in fields:
+        names.update(CALCULATED_FIELD_COLUMNS.get(field, (field,)))
+    return [getattr(Coupon, name) for name in sorted(names)]
+
+def coupon_search_key(user_id: int, filters: CouponSearchFilter, page: int, per_page: int, fields: Optional[tuple] = None) -> tuple:
+    """Hashable key under which equivalent searches are the same search"""
+    def folded(value: Optional[str]) -> Optional[str]:
+        # These filters are matched with ILIKE, so case never changes the result
+        return value.lower() if value else None
+
+    return (
+        user_id,
+        page,
+        per_page,
+        folded(filters.search),
+        filters.status,
+        folded(filters.category),
+        folded(filters.store_name),
+        filters.discount_type,
+        filters.expires_before,
+        filters.expires_after,
+        filters.min_discount,
+        filters.max_discount,
+        bool(filters.unused_only),
+        # Every tag must match, so order and repeats don't matter
+        tuple(sorted(set(filters.tags or []))),
+        fields,
+    )
+
+def encode_cursor(coupon_use: CouponUse) -> str:
+    """Opaque keyset cursor pointing just past ``coupon_use`` in (used_at, id) DESC order"""
+    raw = f"{coupon_use.used_at.isoformat()}|{coupon_use.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        used_at, use_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(used_at), int(use_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
 class CouponService:
     def __init__(self, db: Session):
         self.db = db
 
-    def create_coupon(self, coupon_data: CouponCreate, user_id: int) -> Coupon:
-        # Check if coupon code already exists for this user
-        existing_coupon = self.db.query(Coupon).filter(
-            Coupon.code == coupon_data.code,
-            Coupon.created_by == user_id
-        ).first()
+    def create_coupon(
+        self,
+        coupon_data: CouponCreate,
+        user_id: int,
+        on_conflict: ConflictMode = ConflictMode.ERROR
+    ) -> tuple[Coupon, bool, int]:
+        """Insert with one INSERT ... ON CONFLICT (created_by, code) ... RETURNING, followed on a conflict by a
+        SELECT (skip) or, on SQLite, an UPDATE; (coupon, whether it was created, how many times the user has used it)"""
+        values = {
+            **coupon_data.dict(exclude={'tags'}),
+            'created_by': user_id,
+            'tags': json.dumps(coupon_data.tags) if coupon_data.tags else None,
+        }
+        connection = self.db.connection()
+        owner, change_seq = change_seq_source(connection, user_id)
+        insert = _INSERTS[connection.dialect.name]
+        if owner is None:
+            statement = insert(Coupon).values(**values, change_seq=change_seq)
+        else:
+            # Select the values from the CTE so the owner is locked before change_seq is drawn
+            columns = Coupon.__table__.c
+            row = select(*(literal(value, columns[name].type) for name, value in values.items()), change_seq)
+            statement = insert(Coupon).from_select([*values, 'change_seq'], row.select_from(owner))
         
-        if existing_coupon:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Coupon code already exists"
+        # PostgreSQL tells an update from an insert by xmax, so one upsert does. SQLite has no such
+        # marker: there an existing coupon is updated by a second statement, in the same write transaction
+        upsert = on_conflict == ConflictMode.UPDATE and connection.dialect.name == "postgresql"
+        changes = {name: value for name, value in values.items() if name not in ('created_by', 'code')}
+        if upsert:
+            statement = statement.on_conflict_do_update(
+                index_elements=['created_by', 'code'],
+                set_={
+                    **{name: statement.excluded[name] for name in changes},
+                    'change_seq': statement.excluded.change_seq,
+                    'updated_at': func.now(),
+                }
             )
+            inserted = literal_column("xmax = 0")  # a row updated by ON CONFLICT has a non-zero xmax
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=['created_by', 'code'])
+            inserted = literal(True)
+        statement = statement.returning(Coupon, inserted.label('inserted'), _user_use_count(user_id))
         
-        # Create coupon
-        db_coupon = Coupon(
-            **coupon_data.dict(exclude={'tags'}),
-            created_by=user_id,
-            tags=json.dumps(coupon_data.tags) if coupon_data.tags else None
-        )
-        
-        self.db.add(db_coupon)
-        self.db.commit()
-        self.db.refresh(db_coupon)
+        result = self.db.execute(statement, execution_options={"populate_existing": True}).first()
+        if result is None:
+            if on_conflict == ConflictMode.ERROR:
+                self.db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Coupon code already exists"
+                )
+            if on_conflict == ConflictMode.UPDATE:
+                statement = update(Coupon).where(
+                    Coupon.created_by == user_id,
+                    Coupon.code == coupon_data.code
+                ).values(**changes, change_seq=change_seq, updated_at=func.now())
+                result = self.db.execute(
+                    statement.returning(Coupon, _user_use_count(user_id)),
+                    execution_options={"synchronize_session": False, "populate_existing": True}
+                ).one()
+            else:
+                result = self.db.query(Coupon, _user_use_count(user_id)).filter(
+                    Coupon.code == coupon_data.code,
+                    Coupon.created_by == user_id
+                ).one()
+            self._commit()
+            return result.Coupon, False, result.user_uses
         
-        return db_coupon
+        self._commit()
+        return result.Coupon, bool(result.inserted), result.user_uses
+
+    def _commit(self) -> None:
+        """Commit without expiring loaded objects: coupons hold what RETURNING gave back, so reading them
+        (or the current user) afterwards needs no SELECT"""
+        expire_on_commit = self.db.expire_on_commit
+        self.db.expire_on_commit = False
+        try:
+            self.db.commit()
+        finally:
+            self.db.expire_on_commit = expire_on_commit
 
     def get_coupon(self, coupon_id: int, user_id: int) -> Optional[Coupon]:
         return self.db.query(Coupon).filter(
@@ -51,43 +230,74 @@ class CouponService:
             Coupon.created_by == user_id
         ).first()
 
-    def update_coupon(self, coupon_id: int, coupon_data: CouponUpdate, user_id: int) -> Optional[Coupon]:
-        db_coupon = self.get_coupon(coupon_id, user_id)
-        if not db_coupon:
-            return None
-        
-        # Update fields
-        update_data = coupon_data.dict(exclude_unset=True, exclude={'tags'})
-        for field, value in update_data.items():
-            setattr(db_coupon, field, value)
-        
-        # Handle tags separately
+    def get_coupons_by_ids(self, coupon_ids: List[int], user_id: int) -> List[Coupon]:
+        """The user's coupons among ``coupon_ids``, in no particular order"""
+        return self.db.query(Coupon).filter(
+            Coupon.id.in_(set(coupon_ids)),
+            Coupon.created_by == user_id
+        ).all()
+
+    def update_coupon(
+        self, coupon_id: int, coupon_data: CouponUpdate, user_id: int
+    ) -> Optional[tuple[Coupon, int]]:
+        """Update with one UPDATE ... RETURNING; (coupon, how many times the user has used it), None if not theirs"""
+        values = coupon_data.dict(exclude_unset=True, exclude={'tags'})
         if coupon_data.tags is not None:
-            db_coupon.tags = json.dumps(coupon_data.tags) if coupon_data.tags else None
+            values['tags'] = json.dumps(coupon_data.tags) if coupon_data.tags else None
+        values['updated_at'] = datetime.now(timezone.utc)
         
-        db_coupon.updated_at = datetime.now(timezone.utc)
-        self.db.commit()
-        self.db.refresh(db_coupon)
+        owner, change_seq = change_seq_source(self.db.connection(), user_id)
+        statement = update(Coupon).where(
+            Coupon.id == coupon_id,
+            Coupon.created_by == user_id
+        ).values(**values, change_seq=change_seq)
+        if owner is not None:
+            statement = statement.where(Coupon.created_by == owner.c.id)
+        statement = statement.returning(Coupon, _user_use_count(user_id))
         
-        return db_coupon
+        result = self.db.execute(
+            statement, execution_options={"synchronize_session": False, "populate_existing": True}
+        ).first()
+        if result is None:
+            self.db.rollback()
+            return None
+        self._commit()
+        return result.Coupon, result.user_uses
 
     def delete_coupon(self, coupon_id: int, user_id: int) -> bool:
         db_coupon = self.get_coupon(coupon_id, user_id)
         if not db_coupon:
             return False
         
+        # Its redemptions go with it, whoever made them: rebuild just those users' days of the savings rollup
+        savings_days = coupon_savings_days(self.db, coupon_id)
         self.db.delete(db_coupon)
-        self.db.commit()
+        self.db.flush()
+        rebuild_savings(self.db, days=savings_days)
+        self._commit()
         return True
 
+    def expire_coupons(self, limit: int) -> int:
+        """Mark up to ``limit`` active coupons past their expiration_date as expired"""
+        coupons = self.db.query(Coupon).filter(
+            Coupon.status == CouponStatus.ACTIVE,
+            Coupon.expiration_date < utcnow()
+        ).order_by(Coupon.expiration_date).limit(limit).all()
+        for coupon in coupons:
+            coupon.status = CouponStatus.EXPIRED
+        return len(coupons)
+
     def search_coupons(
         self, 
         user_id: int, 
         filters: CouponSearchFilter, 
         page: int = 1, 
-        per_page: int = 20
+        per_page: int = 20,
+        fields: Optional[Sequence[str]] = None
     ) -> tuple[List[Coupon], int]:
         query = self.db.query(Coupon).filter(Coupon.created_by == user_id)
+        if fields is not None:
+            query = query.options(load_only(*coupon_columns(fields)))
         
         # Apply filters
         if filters.search:
@@ -141,8 +351,76 @@ class CouponService:
         
         return coupons, total
 
-    def use_coupon(self, coupon_id: int, use_data: CouponUseCreate, user_id: int) -> CouponUse:
-        # Get coupon
+    def use_coupon(self, coupon_id: int, use_data: CouponUseCreate, user_id: int) -> tuple[CouponUse, int]:
+        """Redeem with one guarded UPDATE ... RETURNING that only matches a coupon the user can use now;
+        (the use, the coupon owner's id)"""
+        now = utcnow()
+        usage_count = Coupon.usage_count + 1
+        conditions = [
+            Coupon.id == coupon_id,
+            Coupon.status == CouponStatus.ACTIVE,
+            or_(Coupon.expiration_date.is_(None), Coupon.expiration_date >= now),
+            or_(Coupon.start_date.is_(None), Coupon.start_date <= now),
+            # A limit of 0 means no limit, as for null
+            or_(func.coalesce(Coupon.usage_limit, 0) == 0, Coupon.usage_count < Coupon.usage_limit),
+            or_(
+                func.coalesce(Coupon.per_user_limit, 0) == 0,
+                select(func.count()).where(
+                    CouponUse.coupon_id == coupon_id,
+                    CouponUse.user_id == user_id
+                ).scalar_subquery() < Coupon.per_user_limit
+            ),
+        ]
+        if use_data.purchase_amount:
+            conditions.append(or_(Coupon.minimum_purchase.is_(None), Coupon.minimum_purchase <= use_data.purchase_amount))
+        
+        # Locks the coupon owner's users row on PostgreSQL, like any other write to their coupons
+        owner, change_seq = change_seq_source(
+            self.db.connection(), select(Coupon.created_by).where(Coupon.id == coupon_id).scalar_subquery()
+        )
+        if owner is not None:
+            conditions.append(Coupon.created_by == owner.c.id)
+        statement = update(Coupon).where(*conditions).values(
+            usage_count=usage_count,
+            status=case(
+                (and_(Coupon.usage_limit > 0, usage_count >= Coupon.usage_limit), CouponStatus.USED_UP.value),
+                else_=Coupon.status
+            ),
+            change_seq=change_seq
+        ).returning(Coupon)
+        coupon = self.db.execute(
+            statement, execution_options={"synchronize_session": False, "populate_existing": True}
+        ).scalar()
+        if coupon is None:
+            self._raise_unusable(coupon_id, use_data, user_id)
+        
+        # Calculate savings
+        amount_saved = None
+        if use_data.purchase_amount:
+            amount_saved = calculate_savings(
+                coupon.discount_type, coupon.discount_value, use_data.purchase_amount,
+                coupon.minimum_purchase, coupon.maximum_discount
+            )
+        
+        # Create usage record
+        coupon_use = CouponUse(
+            coupon_id=coupon_id,
+            user_id=user_id,
+            used_at=now,
+            # Two places, as the Numeric column would give it back: the row is not reloaded
+            purchase_amount=use_data.purchase_amount.quantize(CENT) if use_data.purchase_amount else None,
+            amount_saved=amount_saved,
+            notes=use_data.notes
+        )
+        self.db.add(coupon_use)
+        record_savings(self.db, coupon, coupon_use)
+        self._commit()
+        
+        return coupon_use, coupon.created_by
+
+    def _raise_unusable(self, coupon_id: int, use_data: CouponUseCreate, user_id: int) -> None:
+        """Raise why use_coupon's UPDATE matched nothing, marking the coupon expired or used up as it goes"""
+        self.db.rollback()
         coupon = self.db.query(Coupon).filter(Coupon.id == coupon_id).first()
         if not coupon:
             raise HTTPException(
@@ -158,7 +436,7 @@ class CouponService:
             )
         
         # Check expiration
-        if coupon.expiration_date and coupon.expiration_date < datetime.now(timezone.utc):
+        if coupon.expiration_date and coupon.expiration_date < utcnow():
             coupon.status = CouponStatus.EXPIRED
             self.db.commit()
             raise HTTPException(
@@ -167,7 +445,7 @@ class CouponService:
             )
         
         # Check start date
-        if coupon.start_date and coupon.start_date > datetime.now(timezone.utc):
+        if coupon.start_date and coupon.start_date > utcnow():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Coupon is not yet valid"
@@ -195,47 +473,132 @@ class CouponService:
                     detail="Per-user usage limit reached for this coupon"
                 )
         
-        # Calculate savings
-        amount_saved = None
-        if use_data.purchase_amount:
-            if coupon.minimum_purchase and use_data.purchase_amount < coupon.minimum_purchase:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Minimum purchase amount is ${coupon.minimum_purchase}"
-                )
-            
-            if coupon.discount_type == DiscountType.AMOUNT:
-                amount_saved = min(coupon.discount_value, use_data.purchase_amount)
-                if coupon.maximum_discount:
-                    amount_saved = min(amount_saved, coupon.maximum_discount)
-            else:  # PERCENT
-                amount_saved = use_data.purchase_amount * (coupon.discount_value / 100)
-                if coupon.maximum_discount:
-                    amount_saved = min(amount_saved, coupon.maximum_discount)
+        if use_data.purchase_amount and coupon.minimum_purchase and use_data.purchase_amount < coupon.minimum_purchase:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Minimum purchase amount is ${coupon.minimum_purchase}"
+            )
         
-        # Create usage record
-        coupon_use = CouponUse(
-            coupon_id=coupon_id,
-            user_id=user_id,
-            purchase_amount=use_data.purchase_amount,
-            amount_saved=amount_saved,
-            notes=use_data.notes
+        # Usable again by now: it changed between the UPDATE and these checks
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Coupon changed while being used, please retry"
         )
+
+    def best_for_purchase(self, purchase: BestCouponRequest, user_id: int) -> BestCouponResponse:
+        """Rank the user's usable coupons by how much they save on this purchase"""
+        now = utcnow()
+        # Narrow column query; the first five columns feed CouponColumns.from_rows
+        query = self.db.query(
+            Coupon.id, Coupon.discount_type, Coupon.discount_value, Coupon.minimum_purchase,
+            Coupon.maximum_discount, Coupon.per_user_limit, Coupon.code, Coupon.title,
+            Coupon.store_name, Coupon.category
+        ).filter(
+            Coupon.created_by == user_id,
+            Coupon.status == CouponStatus.ACTIVE,
+            or_(Coupon.expiration_date.is_(None), Coupon.expiration_date >= now),
+            or_(Coupon.start_date.is_(None), Coupon.start_date <= now),
+            or_(Coupon.usage_limit.is_(None), Coupon.usage_count < Coupon.usage_limit)
+        )
+        # Coupons without a store/category apply everywhere
+        if purchase.store_name:
+            query = query.filter(or_(Coupon.store_name.is_(None), func.lower(Coupon.store_name) == purchase.store_name.lower()))
+        if purchase.category:
+            query = query.filter(or_(Coupon.category.is_(None), func.lower(Coupon.category) == purchase.category.lower()))
+        rows = query.all()
         
-        # Update coupon usage count
-        coupon.usage_count += 1
+        # Drop coupons whose per-user limit is used up (one grouped count for all of them)
+        limited = [row.id for row in rows if row.per_user_limit]
+        if limited:
+            used = _user_use_counts(self.db, limited, user_id)
+            rows = [row for row in rows if not row.per_user_limit or used.get(row.id, 0) < row.per_user_limit]
         
-        # Check if coupon is now used up
-        if coupon.usage_limit and coupon.usage_count >= coupon.usage_limit:
-            coupon.status = CouponStatus.USED_UP
+        ranked = rank_by_savings(CouponColumns.from_rows(rows), purchase.purchase_amount, purchase.limit)
+        by_id = {row.id: row for row in rows}
         
-        self.db.add(coupon_use)
-        self.db.commit()
-        self.db.refresh(coupon_use)
+        return BestCouponResponse(
+            purchase_amount=purchase.purchase_amount,
+            evaluated=len(rows),
+            coupons=[
+                RankedCoupon(
+                    id=coupon_id,
+                    code=by_id[coupon_id].code,
+                    title=by_id[coupon_id].title,
+                    discount_type=by_id[coupon_id].discount_type,
+                    discount_value=by_id[coupon_id].discount_value,
+                    store_name=by_id[coupon_id].store_name,
+                    category=by_id[coupon_id].category,
+                    amount_saved=amount_saved,
+                    final_amount=purchase.purchase_amount - amount_saved
+                )
+                for coupon_id, amount_saved in ranked
+            ]
+        )
+
+    def quote(self, coupon_ids: List[int], quote: QuoteRequest, user_id: int) -> QuoteResponse:
+        """Savings of each coupon on each purchase amount, without redeeming or checking eligibility"""
+        rows = self.db.query(
+            Coupon.id, Coupon.discount_type, Coupon.discount_value, Coupon.minimum_purchase, Coupon.maximum_discount
+        ).filter(
+            Coupon.id.in_(coupon_ids),
+            Coupon.created_by == user_id
+        ).all()
         
-        return coupon_use
+        missing = set(coupon_ids) - {row.id for row in rows}
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Coupon not found: {', '.join(str(coupon_id) for coupon_id in sorted(missing))}"
+            )
+        
+        saved = dict(zip((row.id for row in rows), quote_savings(CouponColumns.from_rows(rows), quote.purchase_amounts)))
+        return QuoteResponse(
+            purchase_amounts=quote.purchase_amounts,
+            quotes=[CouponQuote(coupon_id=coupon_id, amounts_saved=saved[coupon_id]) for coupon_id in dict.fromkeys(coupon_ids)]
+        )
 
-    def get_coupon_uses(self, coupon_id: int, user_id: int) -> List[CouponUse]:
+    def get_changes(self, user_id: int, since: int, limit: int) -> tuple[List[Coupon], List[int], int, bool]:
+        """Coupons changed and ids deleted after change token ``since``, oldest change first"""
+        changed = select(
+            Coupon.change_seq.label("change_seq"), Coupon.id.label("coupon_id"), literal(False).label("deleted")
+        ).where(Coupon.created_by == user_id, Coupon.change_seq > since)
+        if since:
+            # A first sync (no token) has nothing to delete
+            changed = union_all(changed, select(
+                CouponTombstone.change_seq, CouponTombstone.coupon_id, literal(True)
+            ).where(CouponTombstone.created_by == user_id, CouponTombstone.change_seq > since))
+        changes = changed.subquery()
+        rows = self.db.execute(select(changes).order_by(changes.c.change_seq).limit(limit + 1)).all()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if not rows:
+            return [], [], since, False
+        
+        # Only the latest change per coupon counts (an id can be deleted and reused)
+        latest = {}
+        for row in rows:
+            latest.pop(row.coupon_id, None)
+            latest[row.coupon_id] = row.deleted
+        
+        changed_ids = [coupon_id for coupon_id, deleted in latest.items() if not deleted]
+        coupons = []
+        if changed_ids:
+            by_id = {c.id: c for c in self.db.query(Coupon).filter(Coupon.id.in_(changed_ids))}
+            coupons = [by_id[coupon_id] for coupon_id in changed_ids if coupon_id in by_id]
+        deleted_ids = [coupon_id for coupon_id, deleted in latest.items() if deleted]
+        return coupons, deleted_ids, rows[-1].change_seq, has_more
+
+    def get_coupon_uses(
+        self,
+        coupon_id: int,
+        user_id: int,
+        used_by: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> tuple[List[CouponUse], Optional[str]]:
         # Verify user owns the coupon
         coupon = self.get_coupon(coupon_id, user_id)
         if not coupon:
@@ -244,58 +607,265 @@ class CouponService:
                 detail="Coupon not found"
             )
         
-        return self.db.query(CouponUse).filter(CouponUse.coupon_id == coupon_id).all()
+        query = self.db.query(CouponUse).filter(CouponUse.coupon_id == coupon_id)
+        if used_by:
+            query = query.filter(CouponUse.user_id == used_by)
+        
+        return self._page_uses(query, since, until, cursor, limit)
+
+    def get_user_uses(
+        self,
+        user_id: int,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        limit: int = 50
+    ) -> tuple[List[CouponUse], Optional[str]]:
+        query = self.db.query(CouponUse).filter(CouponUse.user_id == user_id)
+        return self._page_uses(query, since, until, cursor, limit)
+
+    def _page_uses(
+        self,
+        query,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        cursor: Optional[str],
+        limit: int
+    ) -> tuple[List[CouponUse], Optional[str]]:
+        """Newest-first keyset page over (used_at, id), served by the (coupon_id|user_id, used_at, id) indexes"""
+        # Bounds on used_at let PostgreSQL skip monthly partitions outside the range
+        if since:
+            query = query.filter(CouponUse.used_at >= since)
+        if until:
+            query = query.filter(CouponUse.used_at < until)
+        if cursor:
+            used_at, use_id = decode_cursor(cursor)
+            query = query.filter(tuple_(CouponUse.used_at, CouponUse.id) < (used_at, use_id))
+        
+        # One extra row tells whether another page exists
+        uses = query.order_by(desc(CouponUse.used_at), desc(CouponUse.id)).limit(limit + 1).all()
+        next_cursor = encode_cursor(uses[limit - 1]) if len(uses) > limit else None
+        return uses[:limit], next_cursor
+
+@job("coupons.expire", every=timedelta(hours=1))
+def expire_coupons_job(db: Session, payload: dict) -> None:
+    if CouponService(db).expire_coupons(EXPIRE_BATCH_SIZE) == EXPIRE_BATCH_SIZE:
+        # More to do: run again straight away (absorbs the hourly run until then)
+        enqueue(db, "coupons.expire", key="coupons.expire")
+
+class AsyncCouponService:
+    """Async facade over CouponService; every call runs through AsyncDB off the event loop"""
+
+    def __init__(self, db: AsyncDB):
+        self.db = db
 
-def _enhance_coupon_response(coupon: Coupon, user_id: int, db: Session) -> CouponResponse:
+    async def create_coupon(
+        self,
+        coupon_data: CouponCreate,
+        user_id: int,
+        on_conflict: ConflictMode = ConflictMode.ERROR
+    ) -> tuple[Coupon, bool, int]:
+        return await self.db.run(lambda session: CouponService(session).create_coupon(coupon_data, user_id, on_conflict))
+
+    async def get_coupon(self, coupon_id: int, user_id: int) -> Optional[Coupon]:
+        return await self.db.run(lambda session: CouponService(session).get_coupon(coupon_id, user_id))
+
+    async def update_coupon(self, coupon_id: int, coupon_data: CouponUpdate, user_id: int) -> Optional[tuple[Coupon, int]]:
+        return await self.db.run(lambda session: CouponService(session).update_coupon(coupon_id, coupon_data, user_id))
+
+    async def delete_coupon(self, coupon_id: int, user_id: int) -> bool:
+        return await self.db.run(lambda session: CouponService(session).delete_coupon(coupon_id, user_id))
+
+    async def search_coupons(
+        self,
+        user_id: int,
+        filters: CouponSearchFilter,
+        page: int = 1,
+        per_page: int = 20
+    ) -> tuple[List[Coupon], int]:
+        return await self.db.run(lambda session: CouponService(session).search_coupons(user_id, filters, page, per_page))
+
+    async def list_coupons(
+        self,
+        user_id: int,
+        filters: CouponSearchFilter,
+        page: int = 1,
+        per_page: int = 20,
+        fields: Optional[Sequence[str]] = None
+    ) -> Dict[str, Any]:
+        """A PaginatedCouponsResponse (or PaginatedPartialCouponsResponse for ``fields``) as a dict, in a single hop to the worker"""
+        def run(session: Session) -> Dict[str, Any]:
+            coupons, total = CouponService(session).search_coupons(user_id, filters, page, per_page, fields)
+            return {
+                "coupons": _coupons_data(coupons, user_id, session, fields),
+                "total": total,
+                "page": page,
+                "per_page": per_page,
+                "total_pages": (total + per_page - 1) // per_page,
+            }
+        return await self.db.run(run)
+
+    async def best_for_purchase(self, purchase: BestCouponRequest, user_id: int) -> BestCouponResponse:
+        return await self.db.run(lambda session: CouponService(session).best_for_purchase(purchase, user_id))
+
+    async def quote(self, coupon_ids: List[int], quote: QuoteRequest, user_id: int) -> QuoteResponse:
+        return await self.db.run(lambda session: CouponService(session).quote(coupon_ids, quote, user_id))
+
+    async def use_coupon(self, coupon_id: int, use_data: CouponUseCreate, user_id: int) -> tuple[CouponUse, int]:
+        return await self.db.run(lambda session: CouponService(session).use_coupon(coupon_id, use_data, user_id))
+
+    async def get_changes(self, user_id: int, since: int, limit: int) -> tuple[List[Coupon], List[int], int, bool]:
+        return await self.db.run(lambda session: CouponService(session).get_changes(user_id, since, limit))
+
+    async def get_coupon_uses(self, coupon_id: int, user_id: int, **page) -> tuple[List[CouponUse], Optional[str]]:
+        return await self.db.run(lambda session: CouponService(session).get_coupon_uses(coupon_id, user_id, **page))
+
+    async def get_user_uses(self, user_id: int, **page) -> tuple[List[CouponUse], Optional[str]]:
+        return await self.db.run(lambda session: CouponService(session).get_user_uses(user_id, **page))
+
+    async def enhance_coupon(self, coupon: Coupon, user_id: int, user_uses: Optional[Dict[int, int]] = None) -> CouponResponse:
+        return await self.db.run(lambda session: _enhance_coupon_response(coupon, user_id, session, user_uses))
+
+    async def coupon_data(self, coupon: Coupon, user_id: int) -> Dict[str, Any]:
+        return await self.db.run(lambda session: _coupon_data(coupon, user_id, session))
+
+    async def coupons_data(self, coupons: List[Coupon], user_id: int) -> List[Dict[str, Any]]:
+        """CouponResponse dicts for a page of coupons in a single hop to the worker"""
+        return await self.db.run(lambda session: _coupons_data(coupons, user_id, session))
+
+    async def get_batch(self, coupon_ids: List[int], user_id: int) -> Dict[str, Any]:
+        """A CouponBatchResponse as a dict: one entry per requested id, in request order"""
+        def run(session: Session) -> Dict[str, Any]:
+            coupons = CouponService(session).get_coupons_by_ids(coupon_ids, user_id)
+            found = {coupon.id: data for coupon, data in zip(coupons, _coupons_data(coupons, user_id, session))}
+            return {"coupons": [
+                {"id": coupon_id, "found": coupon_id in found, "coupon": found.get(coupon_id)}
+                for coupon_id in coupon_ids
+            ]}
+        return await self.db.run(run)
+
+def _enhance_coupon_response(
+    coupon: Coupon, user_id: int, db: Session, user_uses: Optional[Dict[int, int]] = None
+) -> CouponResponse:
     """Enhance coupon data with calculated fields"""
-    # Parse tags
-    tags = json.loads(coupon.tags) if coupon.tags else []
-    
-    # Calculate remaining uses
-    remaining_uses = None
+    data = _coupon_data(coupon, user_id, db, user_uses=user_uses)
+    data["discount_type"] = DiscountType(data["discount_type"])
+    data["status"] = CouponStatus(data["status"])
+    # Values straight from our own rows: nothing to validate
+    return CouponResponse.model_construct(**data)
+
+def _coupons_data(coupons: List[Coupon], user_id: int, db: Session, fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """_coupon_data for many coupons, with the user's uses of all of them counted in one query"""
+    user_uses = None
+    if fields is None or "can_use" in fields:
+        user_uses = _user_use_counts(db, [c.id for c in coupons if c.per_user_limit], user_id)
+    return [_coupon_data(c, user_id, db, fields, user_uses) for c in coupons]
+
+def _coupon_data(
+    coupon: Coupon,
+    user_id: int,
+    db: Session,
+    fields: Optional[Sequence[str]] = None,
+    user_uses: Optional[Dict[int, int]] = None
+) -> Dict[str, Any]:
+    """A CouponResponse as a plain dict, or only ``fields`` of it; calculated fields nobody asked for are not computed"""
+    if fields is None:
+        fields = COUPON_FIELDS
+    data = {field: getattr(coupon, field) for field in fields if field not in CALCULATED_FIELD_COLUMNS}
+    if "tags" in fields:
+        data["tags"] = json.loads(coupon.tags) if coupon.tags else []
+    if "remaining_uses" in fields or "can_use" in fields:
+        remaining_uses = _remaining_uses(coupon)
+        if "remaining_uses" in fields:
+            data["remaining_uses"] = remaining_uses
+        if "can_use" in fields:
+            data["can_use"] = _can_use(coupon, remaining_uses, user_id, db, user_uses)
+    return data
+
+def _use_data(use: CouponUse) -> Dict[str, Any]:
+    """A CouponUseResponse as a plain dict"""
+    return {field: getattr(use, field) for field in COUPON_USE_FIELDS}
+
+def _remaining_uses(coupon: Coupon) -> Optional[int]:
     if coupon.usage_limit:
-        remaining_uses = max(0, coupon.usage_limit - coupon.usage_count)
-    
-    # Check if user can use this coupon
-    can_use = True
+        return max(0, coupon.usage_limit - coupon.usage_count)
+    return None
+
+def _user_use_counts(db: Session, coupon_ids: List[int], user_id: int) -> Dict[int, int]:
+    """How many times the user has used each coupon, in one grouped count"""
+    if not coupon_ids:
+        return {}
+    return dict(db.query(CouponUse.coupon_id, func.count()).filter(
+        CouponUse.user_id == user_id,
+        CouponUse.coupon_id.in_(coupon_ids)
+    ).group_by(CouponUse.coupon_id).all())
+
+def _user_use_count(user_id: int):
+    """How many times the user has used the coupon of the enclosing statement, as a user_uses column"""
+    # Spelled out, as an INSERT does not correlate subqueries and SQLite's RETURNING drops table names
+    return select(func.count()).select_from(CouponUse).where(
+        CouponUse.coupon_id == literal_column(f"{Coupon.__tablename__}.id"),
+        CouponUse.user_id == user_id
+    ).scalar_subquery().label('user_uses')
+
+def _can_use(
+    coupon: Coupon,
+    remaining_uses: Optional[int],
+    user_id: int,
+    db: Session,
+    user_uses: Optional[Dict[int, int]] = None
+) -> bool:
+    """Whether the user can use this coupon right now; ``user_uses`` are counts from _user_use_counts"""
     if coupon.status != CouponStatus.ACTIVE:
-        can_use = False
-    elif coupon.expiration_date and coupon.expiration_date < datetime.now(timezone.utc):
-        can_use = False
-    elif coupon.start_date and coupon.start_date > datetime.now(timezone.utc):
-        can_use = False
-    elif remaining_uses == 0:
-        can_use = False
-    elif coupon.per_user_limit:
-        user_usage = db.query(CouponUse).filter(
-            CouponUse.coupon_id == coupon.id,
-            CouponUse.user_id == user_id
-        ).count()
+        return False
+    if coupon.expiration_date and coupon.expiration_date < utcnow():
+        return False
+    if coupon.start_date and coupon.start_date > utcnow():
+        return False
+    if remaining_uses == 0:
+        return False
+    if coupon.per_user_limit:
+        if user_uses is not None:
+            user_usage = user_uses.get(coupon.id, 0)
+        else:
+            user_usage = db.query(CouponUse).filter(
+                CouponUse.coupon_id == coupon.id,
+                CouponUse.user_id == user_id
+            ).count()
         if user_usage >= coupon.per_user_limit:
-            can_use = False
-    
-    return CouponResponse(
-        **coupon.__dict__,
-        tags=tags,
-        can_use=can_use,
-        remaining_uses=remaining_uses
-    )
+            return False
+    return True
 
 # Routes
 @router.post("/", response_model=CouponResponse, status_code=status.HTTP_201_CREATED)
 async def create_coupon(
     coupon_data: CouponCreate,
+    on_conflict: ConflictMode = Query(
+        ConflictMode.ERROR, description="When you already have a coupon with this code: error, skip (return it) or update it"
+    ),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncDB = Depends(get_async_db)
 ):
-    service = CouponService(db)
-    coupon = service.create_coupon(coupon_data, current_user.id)
-    return _enhance_coupon_response(coupon, current_user.id, db)
+    service = AsyncCouponService(db)
+    coupon, created, user_uses = await service.create_coupon(coupon_data, current_user.id, on_conflict)
+    response = await service.enhance_coupon(coupon, current_user.id, {coupon.id: user_uses})
+    data = response.model_dump(mode="json")
+    if created:
+        await event_broker.publish(current_user.id, "coupon.created", data)
+        return NegotiatedResponse(data, status_code=status.HTTP_201_CREATED)
+    if on_conflict == ConflictMode.UPDATE:
+        await event_broker.publish(current_user.id, "coupon.updated", data)
+    return NegotiatedResponse(data)
 
-@router.get("/", response_model=PaginatedCouponsResponse)
+@router.get(
+    "/",
+    response_model=Union[PaginatedCouponsResponse, PaginatedPartialCouponsResponse]
+)
 async def get_coupons(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated coupon fields to return"),
+    view: Optional[CouponView] = Query(None, description="compact: the fields a coupon card shows"),
     search: Optional[str] = Query(None),
     status: Optional[CouponStatus] = Query(None),
     category: Optional[str] = Query(None),
@@ -307,8 +877,8 @@ async def get_coupons(
     max_discount: Optional[float] = Query(None),
     unused_only: Optional[bool] = Query(None),
     tags: Optional[List[str]] = Query(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_read),
+    db: AsyncDB = Depends(get_read_db)
 ):
     filters = CouponSearchFilter(
         search=search,
@@ -324,27 +894,136 @@ async def get_coupons(
         tags=tags or []
     )
     
-    service = CouponService(db)
-    coupons, total = service.search_coupons(current_user.id, filters, page, per_page)
+    selected = resolve_coupon_fields(fields, view)
+    
+    service = AsyncCouponService(db)
+    if not COUPON_SEARCH_COALESCING:
+        return NegotiatedResponse(await service.list_coupons(current_user.id, filters, page, per_page, selected))
+    return NegotiatedResponse(await coupon_searches.do(
+        coupon_search_key(current_user.id, filters, page, per_page, selected),
+        lambda: service.list_coupons(current_user.id, filters, page, per_page, selected)
+    ))
+
+@router.post("/best-for-purchase", response_model=BestCouponResponse)
+async def best_for_purchase(
+    purchase: BestCouponRequest,
+    current_user: User = Depends(get_current_user_for_read),
+    db: AsyncDB = Depends(get_read_db)
+):
+    service = AsyncCouponService(db)
+    return await service.best_for_purchase(purchase, current_user.id)
+
+@router.post("/quote", response_model=QuoteResponse)
+async def quote_coupons(
+    quote: MultiQuoteRequest,
+    current_user: User = Depends(get_current_user_for_read),
+    db: AsyncDB = Depends(get_read_db)
+):
+    """What each coupon would save on each purchase amount"""
+    service = AsyncCouponService(db)
+    return await service.quote(quote.coupon_ids, quote, current_user.id)
+
+@router.get("/batch", response_model=CouponBatchResponse)
+async def get_coupons_batch(
+    ids: List[str] = Query(..., description="Coupon ids, comma-separated or repeated"),
+    current_user: User = Depends(get_current_user_for_read),
+    db: AsyncDB = Depends(get_read_db)
+):
+    """Several coupons by id, in the order asked for; ids that are not found are marked found=false"""
+    try:
+        coupon_ids = [int(value) for item in ids for value in item.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be integers"
+        )
+    if not coupon_ids or len(coupon_ids) > BATCH_GET_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Between 1 and {BATCH_GET_MAX_IDS} ids; use POST /coupons/batch for more"
+        )
+    service = AsyncCouponService(db)
+    return NegotiatedResponse(await service.get_batch(coupon_ids, current_user.id))
+
+@router.post("/batch", response_model=CouponBatchResponse)
+async def post_coupons_batch(
+    batch: CouponBatchRequest,
+    current_user: User = Depends(get_current_user_for_read),
+    db: AsyncDB = Depends(get_read_db)
+):
+    """GET /coupons/batch for lists of ids too long for a URL"""
+    service = AsyncCouponService(db)
+    return NegotiatedResponse(await service.get_batch(batch.ids, current_user.id))
+
+@router.get("/events")
+async def coupon_events(
+    access_token: Optional[str] = Query(None, description="Bearer token, for clients (EventSource) that cannot set headers"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer)
+):
+    """Server-Sent Events stream of the current user's coupon changes"""
+    token = credentials.credentials if credentials else access_token
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # The stream stays open for hours; don't hold a pooled session (or admission slot) for it
+    user = await run_in_threadpool(user_from_token, token)
+    
+    subscription = event_broker.subscribe(user.id)
+    if subscription is None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many open event streams"
+        )
     
-    enhanced_coupons = [_enhance_coupon_response(c, current_user.id, db) for c in coupons]
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event_id, event, data = await asyncio.wait_for(subscription.queue.get(), EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_event(event_id, event, data)
+                if event == RESYNC:
+                    return
+        finally:
+            event_broker.unsubscribe(subscription)
     
-    return PaginatedCouponsResponse(
-        coupons=enhanced_coupons,
-        total=total,
-        page=page,
-        per_page=per_page,
-        total_pages=(total + per_page - 1) // per_page
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
+@router.get("/sync", response_model=CouponSyncResponse)
+async def sync_coupons(
+    since: int = Query(0, ge=0, description="next_token from the previous sync; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=1000),
+    current_user: User = Depends(get_current_user_for_read),
+    db: AsyncDB = Depends(get_read_db)
+):
+    """Coupons created, changed or deleted since the last sync"""
+    service = AsyncCouponService(db)
+    coupons, deleted, next_token, has_more = await service.get_changes(current_user.id, since, limit)
+    return NegotiatedResponse({
+        "coupons": await service.coupons_data(coupons, current_user.id) if coupons else [],
+        "deleted": deleted,
+        "next_token": next_token,
+        "has_more": has_more,
+    })
+
 @router.get("/{coupon_id}", response_model=CouponResponse)
 async def get_coupon(
     coupon_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_for_read),
+    db: AsyncDB = Depends(get_read_db)
 ):
-    service = CouponService(db)
-    coupon = service.get_coupon(coupon_id, current_user.id)
+    service = AsyncCouponService(db)
+    coupon = await service.get_coupon(coupon_id, current_user.id)
     
     if not coupon:
         raise HTTPException(
@@ -352,34 +1031,38 @@ async def get_coupon(
             detail="Coupon not found"
         )
     
-    return _enhance_coupon_response(coupon, current_user.id, db)
+    return NegotiatedResponse(await service.coupon_data(coupon, current_user.id))
 
 @router.put("/{coupon_id}", response_model=CouponResponse)
 async def update_coupon(
     coupon_id: int,
     coupon_data: CouponUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncDB = Depends(get_async_db)
 ):
-    service = CouponService(db)
-    coupon = service.update_coupon(coupon_id, coupon_data, current_user.id)
+    service = AsyncCouponService(db)
+    updated = await service.update_coupon(coupon_id, coupon_data, current_user.id)
     
-    if not coupon:
+    if not updated:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Coupon not found"
         )
     
-    return _enhance_coupon_response(coupon, current_user.id, db)
+    coupon, user_uses = updated
+    response = await service.enhance_coupon(coupon, current_user.id, {coupon.id: user_uses})
+    data = response.model_dump(mode="json")
+    await event_broker.publish(current_user.id, "coupon.updated", data)
+    return NegotiatedResponse(data)
 
 @router.delete("/{coupon_id}")
 async def delete_coupon(
     coupon_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncDB = Depends(get_async_db)
 ):
-    service = CouponService(db)
-    deleted = service.delete_coupon(coupon_id, current_user.id)
+    service = AsyncCouponService(db)
+    deleted = await service.delete_coupon(coupon_id, current_user.id)
     
     if not deleted:
         raise HTTPException(
@@ -387,6 +1070,7 @@ async def delete_coupon(
             detail="Coupon not found"
         )
     
+    await event_broker.publish(current_user.id, "coupon.deleted", {"id": coupon_id})
     return {"message": "Coupon deleted successfully"}
 
 @router.post("/{coupon_id}/use", response_model=CouponUseResponse)
@@ -394,17 +1078,57 @@ async def use_coupon(
     coupon_id: int,
     use_data: CouponUseCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncDB = Depends(get_async_db)
 ):
-    service = CouponService(db)
-    coupon_use = service.use_coupon(coupon_id, use_data, current_user.id)
+    service = AsyncCouponService(db)
+    coupon_use, owner_id = await service.use_coupon(coupon_id, use_data, current_user.id)
+    data = CouponUseResponse.model_validate(coupon_use).model_dump(mode="json")
+    # The owner's streams and cached searches follow their coupon's usage; the redeemer sees their own use
+    for user_id in {owner_id, coupon_use.user_id}:
+        await event_broker.publish(user_id, "coupon.used", data)
     return coupon_use
 
-@router.get("/{coupon_id}/uses", response_model=List[CouponUseResponse])
+@router.post("/{coupon_id}/quote", response_model=QuoteResponse)
+async def quote_coupon(
+    coupon_id: int,
+    quote: QuoteRequest,
+    current_user: User = Depends(get_current_user_for_read),
+    db: AsyncDB = Depends(get_read_db)
+):
+    """What this coupon would save on each purchase amount"""
+    service = AsyncCouponService(db)
+    return await service.quote([coupon_id], quote, current_user.id)
+
+@router.get("/{coupon_id}/uses", response_model=PaginatedCouponUsesResponse)
 async def get_coupon_uses(
     coupon_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_id: Optional[int] = Query(None, description="Only uses by this user"),
+    since: Optional[datetime] = Query(None, description="Only uses at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only uses before this time"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user_for_read),
+    db: AsyncDB = Depends(get_read_db)
 ):
-    service = CouponService(db)
-    return service.get_coupon_uses(coupon_id, current_user.id)
\ No newline at end of file
+    service = AsyncCouponService(db)
+    uses, next_cursor = await service.get_coupon_uses(
+        coupon_id, current_user.id,
+        used_by=user_id, since=since, until=until, cursor=cursor, limit=limit
+    )
+    return NegotiatedResponse({"uses": [_use_data(use) for use in uses], "limit": limit, "next_cursor": next_cursor})
+
+@uses_router.get("/", response_model=PaginatedCouponUsesResponse)
+async def get_my_uses(
+    since: Optional[datetime] = Query(None, description="Only uses at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only uses before this time"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user_for_read),
+    db: AsyncDB = Depends(get_read_db)
+):
+    """The current user's redemptions across all coupons, newest first"""
+    service = AsyncCouponService(db)
+    uses, next_cursor = await service.get_user_uses(
+        current_user.id, since=since, until=until, cursor=cursor, limit=limit
+    )
+    return NegotiatedResponse({"uses": [_use_data(use) for use in uses], "limit": limit, "next_cursor": next_cursor})
\ No newline at end of file
@@ -0,0 +1,196 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import os
+
+from models.database import SessionLocal, engine, Coupon, utcnow
+from schemas.coupon import CouponStatus
+from core.events import EventBroker
+from core.reminders import Reminder, ReminderScheduler, ReminderSink, event_sink, log_sink, webhook_sink
+
+logger = logging.getLogger(__name__)
+
+REMINDERS_ENABLED = os.getenv("REMINDERS_ENABLED", "true").lower() == "true"
+# Remind this long before a coupon expires
+REMINDER_LEAD_HOURS = float(os.getenv("REMINDER_LEAD_HOURS", "24"))
+# Reminders due within this window are held in memory; the window is extended halfway through
+REMINDER_HORIZON_HOURS = float(os.getenv("REMINDER_HORIZON_HOURS", "6"))
+# Comma-separated: log, events (SSE), webhook (POST to REMINDER_WEBHOOK_URL)
+REMINDER_SINKS = os.getenv("REMINDER_SINKS", "log,events")
+REMINDER_WEBHOOK_URL = os.getenv("REMINDER_WEBHOOK_URL")
+
+# pg_try_advisory_lock key; only the holder sends reminders
+LEADER_LOCK_KEY = 0x636F7570
+
+class ReminderService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def upcoming(self, start: datetime, end: datetime) -> List[tuple]:
+        """(id, created_by, expiration_date) of active coupons expiring in (start, end], from idx_coupon_status_expiry"""
+        return self.db.query(Coupon.id, Coupon.created_by, Coupon.expiration_date).filter(
+            Coupon.status == CouponStatus.ACTIVE,
+            Coupon.expiration_date > start,
+            Coupon.expiration_date <= end
+        ).all()
+
+    def still_due(self, reminders: List[Reminder]) -> List[Reminder]:
+        """Reminders whose coupon is still active and still expires when the reminder was scheduled for"""
+        current = dict(self.db.query(Coupon.id, Coupon.expiration_date).filter(
+            Coupon.id.in_([reminder.coupon_id for reminder in reminders]),
+            Coupon.status == CouponStatus.ACTIVE
+        ).all())
+        return [reminder for reminder in reminders if current.get(reminder.coupon_id) == reminder.expiration_date]
+
+def _with_session(fn, *args):
+    db = SessionLocal()
+    try:
+        return fn(ReminderService(db), *args)
+    finally:
+        db.close()
+
+def _naive_utc(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+class ExpirationReminders:
+    """Sends a reminder REMINDER_LEAD_HOURS before each active coupon expires.
+
+    Keeps the next REMINDER_HORIZON_HOURS of reminders in a ReminderScheduler,
+    filled by one range query on (status, expiration_date) at startup and each
+    time the window is extended, and kept current from the coupon events of
+    every worker (via the EventBroker). Each reminder is re-checked against the
+    database before it is sent. With several processes, a PostgreSQL advisory
+    lock picks the one that sends reminders. Reminders that fell due while no
+    process was running are skipped rather than sent late.
+    """
+
+    def __init__(self, broker: EventBroker, sinks: List[ReminderSink], lead_time: timedelta, horizon: timedelta):
+        self.broker = broker
+        self.sinks = sinks
+        self.horizon = horizon
+        self.scheduler = ReminderScheduler(lead_time)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._leader_connection = None
+
+    async def start(self) -> None:
+        self.broker.add_listener(self.on_event)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._leader_connection is not None:
+            await run_in_threadpool(self._leader_connection.close)
+            self._leader_connection = None
+
+    def on_event(self, user_id: int, event: str, data: Dict[str, Any]) -> None:
+        """Apply a coupon create/update/delete to the schedule"""
+        if self.scheduler.loaded_until is None:
+            return
+        if event == "coupon.deleted":
+            self.scheduler.cancel(data["id"])
+        elif event in ("coupon.created", "coupon.updated"):
+            if data.get("status") == CouponStatus.ACTIVE and data.get("expiration_date"):
+                if self.scheduler.schedule(data["id"], data["created_by"], _naive_utc(data["expiration_date"])):
+                    self._wakeup.set()
+            else:
+                self.scheduler.cancel(data["id"])
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if not await run_in_threadpool(self._acquire_leadership):
+                    await asyncio.sleep(self.horizon.total_seconds() / 2)
+                    continue
+                await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Expiration reminder loop failed, retrying: {e}")
+                await asyncio.sleep(60)
+
+    async def _tick(self) -> None:
+        now = utcnow()
+        scheduler = self.scheduler
+        if scheduler.loaded_until is None or scheduler.loaded_until - now < self.horizon / 2:
+            await self._extend(now)
+        
+        due = scheduler.pop_due(now)
+        if due:
+            for reminder in await run_in_threadpool(_with_session, ReminderService.still_due, due):
+                for sink in self.sinks:
+                    await sink(reminder)
+        
+        # Sleep until the next reminder or the next window extension, whichever is first
+        wake_at = scheduler.loaded_until - self.horizon / 2
+        next_due = scheduler.next_due()
+        if next_due is not None:
+            wake_at = min(wake_at, next_due)
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), max(0.0, (wake_at - utcnow()).total_seconds()))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _extend(self, now: datetime) -> None:
+        """Load reminders due up to now + horizon that are not held yet"""
+        scheduler = self.scheduler
+        start = now if scheduler.loaded_until is None else scheduler.loaded_until
+        end = now + self.horizon
+        # Move the window first so changes made while the query runs are scheduled too
+        scheduler.loaded_until = end
+        rows = await run_in_threadpool(
+            _with_session, ReminderService.upcoming, start + scheduler.lead_time, end + scheduler.lead_time
+        )
+        for coupon_id, user_id, expiration_date in rows:
+            # An event seen during the query is newer than the row
+            if coupon_id not in scheduler:
+                scheduler.schedule(coupon_id, user_id, expiration_date)
+        logger.info(f"Loaded {len(rows)} expiration reminders due before {end.isoformat()}")
+
+    def _acquire_leadership(self) -> bool:
+        if engine.dialect.name != "postgresql" or self._leader_connection is not None:
+            return True
+        # A dedicated connection outside the pool holds the session-level lock for the process lifetime
+        connection = create_engine(engine.url, poolclass=NullPool).connect()
+        if connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": LEADER_LOCK_KEY}).scalar():
+            connection.commit()
+            self._leader_connection = connection
+            logger.info("This process sends expiration reminders")
+            return True
+        connection.close()
+        return False
+
+def create_expiration_reminders(broker: EventBroker) -> Optional[ExpirationReminders]:
+    """ExpirationReminders configured from the environment, or None when disabled"""
+    if not REMINDERS_ENABLED:
+        return None
+    sinks = []
+    for name in (name.strip() for name in REMINDER_SINKS.split(",")):
+        if name == "log":
+            sinks.append(log_sink)
+        elif name == "events":
+            sinks.append(event_sink(broker))
+        elif name == "webhook" and REMINDER_WEBHOOK_URL:
+            sinks.append(webhook_sink(REMINDER_WEBHOOK_URL))
+        elif name:
+            logger.warning(f"Ignoring unknown or unconfigured reminder sink '{name}'")
+    return ExpirationReminders(
+        broker, sinks,
+        lead_time=timedelta(hours=REMINDER_LEAD_HOURS),
+        horizon=timedelta(hours=REMINDER_HORIZON_HOURS)
+    )
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Database concurrency benchmark for the Family Coupon Manager
+Drives GET /coupons and GET /health concurrently on a single event loop, the same
+situation as `uvicorn --workers 1`. SQLite answers instantly, so every statement gets
+DB_LATENCY_MS of simulated server/network latency on the thread executing it. Compares:
+
+  blocking    ORM calls made directly on the event loop (behaviour before AsyncDB)
+  threadpool  sync Session through AsyncDB on the threadpool (DATABASE_ASYNC=false)
+  async       AsyncSession with aiosqlite/asyncpg (DATABASE_ASYNC=true)
+
+Usage: python benchmarks/async_db_bench.py [requests] [concurrency]
+"""
+
+import sys
+import os
+import asyncio
+import statistics
+import subprocess
+import tempfile
+import time
+
+from sqlalchemy import event
+from sqlalchemy.util import await_only
+
+# Add the parent directory to the path to import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COUPON_COUNT = 2_000
+DB_LATENCY_MS = 5
+PROBE_INTERVAL = 0.01
+
+def seed(database_url: str) -> None:
+    os.environ["DATABASE_URL"] = database_url
+    from models.database import Base, engine, User, Coupon
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": 1, "email": "bench@family.com", "username": "bench",
+            "full_name": "Bench", "password_hash": "x", "is_active": True,
+        }])
+        conn.execute(Coupon.__table__.insert(), [{
+            "code": f"CODE{i}", "title": f"Coupon {i}", "description": "benchmark coupon " * 5,
+            "discount_type": "amount", "discount_value": 5, "status": "active",
+            "usage_count": 0, "created_by": 1,
+        } for i in range(COUPON_COUNT)])
+
+async def drive(total: int, concurrency: int) -> dict:
+    import httpx
+    from core.security import SecurityManager
+    import main
+
+    token = SecurityManager.create_access_token({"sub": "1"})
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=main.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await client.get("/api/v1/coupons/?search=warmup", headers=headers)
+
+        health_latencies = []
+        done = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        async def list_worker(count: int):
+            for _ in range(count):
+                response = await client.get("/api/v1/coupons/?search=no-such-coupon", headers=headers)
+                response.raise_for_status()
+
+        async def health_probe():
+            # Latency is measured from the scheduled send time, so loop stalls are not hidden
+            scheduled = loop.time()
+            while not done.is_set():
+                scheduled += PROBE_INTERVAL
+                await asyncio.sleep(max(0, scheduled - loop.time()))
+                await client.get("/health")
+                health_latencies.append((loop.time() - scheduled) * 1000)
+
+        probe = asyncio.create_task(health_probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(list_worker(total // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe
+
+    health_latencies.sort()
+    return {
+        "rps": (total // concurrency) * concurrency / elapsed,
+        "health_p50_ms": statistics.median(health_latencies),
+        "health_p99_ms": health_latencies[max(0, int(len(health_latencies) * 0.99) - 1)],
+    }
+
+def add_latency(engine) -> None:
+    """Sleep DB_LATENCY_MS inside SQLite for every statement, on whichever thread runs it"""
+    def on_connect(dbapi_connection, connection_record):
+        delay = lambda statement: time.sleep(DB_LATENCY_MS / 1000)
+        driver_connection = getattr(dbapi_connection, "driver_connection", None)
+        if driver_connection is not None:  # aiosqlite: runs on its own worker thread
+            await_only(driver_connection.set_trace_callback(delay))
+        else:
+            dbapi_connection.set_trace_callback(delay)
+
+    event.listen(engine, "connect", on_connect)
+
+def run_mode(mode: str, total: int, concurrency: int) -> None:
+    """Executed in a subprocess because DATABASE_ASYNC is read at import time"""
+    from models.database import engine, async_engine
+
+    add_latency(async_engine.sync_engine if async_engine is not None else engine)
+
+    if mode == "blocking":
+        from models.database import AsyncDB
+
+        async def run_inline(self, fn, *args, **kwargs):
+            return fn(self.session, *args, **kwargs)
+
+        AsyncDB.run = run_inline
+
+    result = asyncio.run(drive(total, concurrency))
+    print(f"{mode:12s} {result['rps']:8.1f} req/s   /health p50={result['health_p50_ms']:.1f}ms p99={result['health_p99_ms']:.1f}ms")
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--mode":
+        run_mode(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+        return
+
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{tmp}/bench.db"
+        seed(database_url)
+        print(f"{total} list requests over {COUPON_COUNT} coupons, concurrency {concurrency}, one event loop")
+
+        for mode in ("blocking", "threadpool", "async"):
+            env = dict(
+                os.environ,
+                DATABASE_URL=database_url,
+                DATABASE_ASYNC="true" if mode == "async" else "false",
+                LOG_LEVEL="WARNING",
+            )
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode, str(total), str(concurrency)],
+                env=env,
+                check=True,
+            )
+
+if __name__ == "__main__":
+    main()
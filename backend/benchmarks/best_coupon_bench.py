@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Best-coupon ranking benchmark for the Family Coupon Manager
+Ranks synthetic coupons by the amount they save on one purchase, the work done by
+POST /coupons/best-for-purchase once the candidate rows are loaded. Compares:
+
+  loop        core.discounts.calculate_savings per coupon, as POST /coupons/{id}/use does
+  vectorized  core.discounts.rank_by_savings over numpy column arrays
+  ranking     the vectorized ranking alone, columns already built
+
+and checks that both produce the same ranking, and that quote_savings matches
+calculate_savings to the cent over a grid of purchase amounts.
+
+Usage: python benchmarks/best_coupon_bench.py [coupons] [repeats]
+"""
+
+import sys
+import os
+import random
+import statistics
+import time
+from decimal import Decimal
+
+# Add the parent directory to the path to import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.discounts import CouponColumns, calculate_savings, quote_savings, rank_by_savings
+
+PURCHASE_AMOUNT = Decimal("87.50")
+LIMIT = 10
+
+def make_rows(count: int) -> list:
+    rng = random.Random(42)
+    rows = []
+    for coupon_id in range(1, count + 1):
+        if rng.random() < 0.5:
+            rows.append((coupon_id, "percent", Decimal(rng.randint(500, 5000)) / 100,
+                         rng.choice([None, Decimal(rng.randint(20, 150))]),
+                         rng.choice([None, Decimal(rng.randint(5, 40))])))
+        else:
+            rows.append((coupon_id, "amount", Decimal(rng.randint(1, 60)),
+                         rng.choice([None, Decimal(rng.randint(20, 150))]), None))
+    return rows
+
+def rank_loop(rows: list, purchase_amount: Decimal, limit: int) -> list:
+    ranked = []
+    for coupon_id, *terms in rows:
+        discount_type, discount_value, minimum_purchase, maximum_discount = terms
+        amount_saved = calculate_savings(discount_type, discount_value, purchase_amount, minimum_purchase, maximum_discount)
+        if amount_saved is not None:
+            ranked.append((coupon_id, amount_saved))
+    ranked.sort(key=lambda item: item[1], reverse=True)
+    return ranked[:limit]
+
+def rank_vectorized(rows: list, purchase_amount: Decimal, limit: int) -> list:
+    return rank_by_savings(CouponColumns.from_rows(rows), purchase_amount, limit)
+
+def check_quotes(rows: list) -> bool:
+    """Vectorized quotes equal the scalar calculator on every (coupon, amount) pair"""
+    rng = random.Random(7)
+    amounts = [Decimal(rng.randint(1, 30000)) / 100 for _ in range(200)]
+    quotes = quote_savings(CouponColumns.from_rows(rows), amounts)
+    for (coupon_id, *terms), saved in zip(rows, quotes):
+        discount_type, discount_value, minimum_purchase, maximum_discount = terms
+        expected = [calculate_savings(discount_type, discount_value, amount, minimum_purchase, maximum_discount) for amount in amounts]
+        if saved != expected:
+            print(f"❌ Quotes differ for coupon {coupon_id}")
+            return False
+    return True
+
+def timed(fn, repeats: int) -> list:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    rows = make_rows(count)
+
+    expected = rank_loop(rows, PURCHASE_AMOUNT, LIMIT)
+    actual = rank_vectorized(rows, PURCHASE_AMOUNT, LIMIT)
+    if expected != actual:
+        print("❌ Rankings differ")
+        print(f"   loop:       {expected}")
+        print(f"   vectorized: {actual}")
+        sys.exit(1)
+    print(f"✅ Rankings match for {count} coupons (top {LIMIT}, purchase ${PURCHASE_AMOUNT})")
+    if not check_quotes(rows[:1000]):
+        sys.exit(1)
+    print("✅ Quotes match calculate_savings for 1000 coupons x 200 amounts")
+
+    # Columns are rebuilt every time in "vectorized", as they are per request
+    columns = CouponColumns.from_rows(rows)
+    results = {
+        "loop": timed(lambda: rank_loop(rows, PURCHASE_AMOUNT, LIMIT), repeats),
+        "vectorized": timed(lambda: rank_vectorized(rows, PURCHASE_AMOUNT, LIMIT), repeats),
+        "ranking": timed(lambda: rank_by_savings(columns, PURCHASE_AMOUNT, LIMIT), repeats),
+    }
+    print(f"{'mode':<12}{'median ms':>12}{'p95 ms':>12}")
+    for mode, samples in results.items():
+        p95 = statistics.quantiles(samples, n=20)[-1]
+        print(f"{mode:<12}{statistics.median(samples):>12.2f}{p95:>12.2f}")
+
+if __name__ == "__main__":
+    main()
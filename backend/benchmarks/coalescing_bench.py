@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+List-query coalescing load test for the Family Coupon Manager
+Fans many concurrent GET /coupons requests for the same search in on one event loop,
+as when every device of a family refreshes the coupon list at once. Half the clients
+spell the search differently (case, tag order) to exercise the key normalization.
+SQLite answers instantly, so every statement gets DB_LATENCY_MS of simulated latency.
+Counts the SQL statements the requests cause and compares:
+
+  off   every request runs its own queries (COUPON_SEARCH_COALESCING=false)
+  on    identical requests in flight together share one set of queries
+
+Usage: python benchmarks/coalescing_bench.py [requests] [concurrency]
+"""
+
+import sys
+import os
+import asyncio
+import subprocess
+import tempfile
+import time
+
+from sqlalchemy import event
+
+# Add the parent directory to the path to import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COUPON_COUNT = 2_000
+DB_LATENCY_MS = 5
+QUERIES = (
+    "/api/v1/coupons/?search=coupon+1&tags=grocery&tags=weekly",
+    "/api/v1/coupons/?search=Coupon+1&tags=weekly&tags=grocery",
+)
+
+def seed(database_url: str) -> None:
+    os.environ["DATABASE_URL"] = database_url
+    from models.database import Base, engine, User, Coupon
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [{
+            "id": 1, "email": "bench@family.com", "username": "bench",
+            "full_name": "Bench", "password_hash": "x", "is_active": True,
+        }])
+        conn.execute(Coupon.__table__.insert(), [{
+            "code": f"CODE{i}", "title": f"Coupon {i}", "description": "benchmark coupon " * 5,
+            "discount_type": "amount", "discount_value": 5, "status": "active",
+            "usage_count": 0, "per_user_limit": 1 if i % 2 else None,
+            "tags": '["grocery", "weekly"]' if i % 3 else '["grocery"]', "created_by": 1,
+        } for i in range(COUPON_COUNT)])
+
+async def drive(total: int, concurrency: int, statements: dict) -> dict:
+    import httpx
+    from core.security import SecurityManager
+    import main
+
+    token = SecurityManager.create_access_token({"sub": "1"})
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=main.app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        bodies = [(await client.get(url, headers=headers)).json() for url in QUERIES]
+        assert bodies[0] == bodies[1], "normalized searches returned different results"
+
+        async def list_worker(index: int, count: int):
+            for _ in range(count):
+                response = await client.get(QUERIES[index % len(QUERIES)], headers=headers)
+                response.raise_for_status()
+                assert response.json() == bodies[0]
+
+        statements.update(total=0, coupons=0)
+        start = time.perf_counter()
+        await asyncio.gather(*(list_worker(index, total // concurrency) for index in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    requests = (total // concurrency) * concurrency
+    return {
+        "rps": requests / elapsed,
+        "qps": statements["total"] / elapsed,
+        "coupon_qps": statements["coupons"] / elapsed,
+        "per_request": statements["coupons"] / requests,
+    }
+
+def instrument(engine, statements: dict) -> None:
+    """Count statements, and sleep DB_LATENCY_MS inside SQLite for each on the thread running it"""
+    def on_connect(dbapi_connection, connection_record):
+        dbapi_connection.set_trace_callback(lambda statement: time.sleep(DB_LATENCY_MS / 1000))
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements["total"] += 1
+        # Everything but the per-request user lookup done by authentication
+        if "FROM users" not in statement:
+            statements["coupons"] += 1
+
+    event.listen(engine, "connect", on_connect)
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+
+def run_mode(mode: str, total: int, concurrency: int) -> None:
+    """Executed in a subprocess because COUPON_SEARCH_COALESCING is read at import time"""
+    from models.database import engine
+
+    statements = {"total": 0, "coupons": 0}
+    instrument(engine, statements)
+    result = asyncio.run(drive(total, concurrency, statements))
+    print(
+        f"{mode:4s} {result['rps']:8.1f} req/s {result['qps']:9.1f} queries/s "
+        f"{result['coupon_qps']:9.1f} coupon queries/s {result['per_request']:6.2f} coupon queries/request"
+    )
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--mode":
+        run_mode(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+        return
+
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{tmp}/bench.db"
+        seed(database_url)
+        print(f"{total} identical list requests over {COUPON_COUNT} coupons, concurrency {concurrency}, one event loop")
+
+        for mode in ("off", "on"):
+            env = dict(
+                os.environ,
+                DATABASE_URL=database_url,
+                DATABASE_ASYNC="false",
+                COUPON_SEARCH_COALESCING="true" if mode == "on" else "false",
+                LOG_LEVEL="WARNING",
+                JOBS_ENABLED="false",
+                REMINDERS_ENABLED="false",
+            )
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode, str(total), str(concurrency)],
+                env=env,
+                check=True,
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Middleware benchmark for the Family Coupon Manager
+Compares the legacy BaseHTTPMiddleware stack with the pure ASGI RequestMiddleware
+on a trivial endpoint, in-process (no network) so only middleware overhead is measured.
+
+Usage: python benchmarks/middleware_bench.py [requests] [concurrency]
+"""
+
+import sys
+import os
+import asyncio
+import statistics
+import time
+
+# Add the parent directory to the path to import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from core.middleware import RequestMiddleware, get_client_ip
+
+async def ping(request):
+    return JSONResponse({"status": "ok"})
+
+class LegacySecurityMiddleware(BaseHTTPMiddleware):
+    """Equivalent of the former SecurityMiddleware layer"""
+
+    async def dispatch(self, request, call_next):
+        request.state.request_id = "bench"
+        client_ip = get_client_ip(request.scope, request.headers)
+        RequestMiddleware(None)._is_suspicious_request(request.scope, request.headers)
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-Request-ID"] = client_ip
+        return response
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """Equivalent of the former RateLimitMiddleware layer"""
+
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        response.headers["X-RateLimit-Limit"] = "1000000"
+        return response
+
+class LegacyHeadersMiddleware(BaseHTTPMiddleware):
+    """Equivalent of the former @app.middleware("http") in main.py"""
+
+    async def dispatch(self, request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["X-Process-Time"] = str(time.time() - start_time)
+        return response
+
+def build_legacy_app() -> Starlette:
+    return Starlette(
+        routes=[Route("/ping", ping)],
+        middleware=[
+            Middleware(LegacyHeadersMiddleware),
+            Middleware(LegacySecurityMiddleware),
+            Middleware(LegacyRateLimitMiddleware),
+        ],
+    )
+
+def build_asgi_app() -> Starlette:
+    return Starlette(
+        routes=[Route("/ping", ping)],
+        middleware=[Middleware(RequestMiddleware, calls_per_minute=1_000_000)],
+    )
+
+async def run(app: Starlette, total: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up
+        for _ in range(50):
+            await client.get("/ping")
+
+        # Sequential latency
+        latencies = []
+        for _ in range(total):
+            start = time.perf_counter()
+            await client.get("/ping")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        # Concurrent throughput
+        async def worker(count: int):
+            for _ in range(count):
+                await client.get("/ping")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(total // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+        "rps": (total // concurrency) * concurrency / elapsed,
+    }
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    results = {
+        "before (3x BaseHTTPMiddleware + http middleware)": asyncio.run(run(build_legacy_app(), total, concurrency)),
+        "after (single pure ASGI middleware)": asyncio.run(run(build_asgi_app(), total, concurrency)),
+    }
+
+    print(f"{total} requests, concurrency {concurrency}")
+    for name, result in results.items():
+        print(f"{name:50s} p50={result['p50_ms']:.3f}ms p99={result['p99_ms']:.3f}ms {result['rps']:.0f} req/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+MessagePack vs JSON benchmark for the Family Coupon Manager
+Encodes the bodies of a GET /coupons page and a redemption list (GET /uses) as the API
+does for Accept: application/json and Accept: application/msgpack, and decodes them as
+a Python client would. Compares payload bytes, encode and decode time for:
+
+  json     orjson, Decimals as strings and datetimes as ISO 8601 strings (core.serialization.dumps)
+  msgpack  Decimals as strings and datetimes as timestamp extensions (core.serialization.msgpack_dumps)
+
+Usage: python benchmarks/msgpack_bench.py [coupons] [uses] [repeats]  (best of the repeats is reported)
+"""
+
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import msgpack
+import orjson
+
+# Add the parent directory to the path to import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Nothing here touches the database, but importing the models creates an engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from models.database import Coupon, CouponUse
+from api.coupons import _coupon_data, _use_data
+from core.serialization import dumps, msgpack_dumps
+
+def coupon_page(count: int) -> dict:
+    now = datetime(2026, 1, 1, 12, 0, 0)
+    coupons = [Coupon(
+        id=i, code=f"CODE{i}", title=f"Coupon {i}", description="benchmark coupon " * 20,
+        discount_type="percent" if i % 2 else "amount", discount_value=Decimal("12.50"),
+        minimum_purchase=Decimal("20.00") if i % 3 else None, maximum_discount=Decimal("15.00"),
+        usage_limit=10 if i % 4 else None, usage_count=i % 10, per_user_limit=None,
+        start_date=now, expiration_date=now + timedelta(days=30 + i),
+        created_at=now, updated_at=now, status="active", store_name="Grocer",
+        category="Food", tags='["grocery", "weekly"]', created_by=1,
+    ) for i in range(count)]
+    items = [_coupon_data(coupon, 1, None) for coupon in coupons]
+    return {"coupons": items, "total": count, "page": 1, "per_page": count, "total_pages": 1}
+
+def use_page(count: int) -> dict:
+    now = datetime(2026, 1, 1, 12, 0, 0, 123456)
+    uses = [CouponUse(
+        id=i, coupon_id=i % 50, user_id=1 + i % 4, used_at=now - timedelta(minutes=i),
+        purchase_amount=Decimal("87.50"), amount_saved=Decimal("8.75"), notes=None,
+    ) for i in range(count)]
+    return {"uses": [_use_data(use) for use in uses], "limit": count, "next_cursor": None}
+
+def best_ms(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+def main():
+    coupons = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    uses = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    repeats = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    payloads = {f"{coupons} coupons": coupon_page(coupons), f"{uses} uses": use_page(uses)}
+    print(f"{'payload':12s} {'format':8s} {'bytes':>9s} {'encode ms':>10s} {'decode ms':>10s}")
+    for name, content in payloads.items():
+        for fmt, encode, decode in (
+            ("json", dumps, orjson.loads),
+            ("msgpack", msgpack_dumps, lambda body: msgpack.unpackb(body, timestamp=3)),
+        ):
+            body = encode(content)
+            print(
+                f"{name:12s} {fmt:8s} {len(body):9d} "
+                f"{best_ms(lambda: encode(content), repeats):10.3f} {best_ms(lambda: decode(body), repeats):10.3f}"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Coupon response serialization benchmark for the Family Coupon Manager
+Turns a page of loaded Coupon rows into the JSON body of GET /coupons, the work left
+once the queries are done. Compares:
+
+  validated   CouponResponse(**row) per coupon, then validation and serialization
+              against the response_model and json.dumps, as FastAPI does for a model
+  construct   CouponResponse.model_construct per coupon, Pydantic serialization
+  trusted     plain dicts mapped from the rows and encoded with orjson (core.serialization),
+              what GET /coupons does now
+
+and checks that all three produce the same JSON.
+
+Usage: python benchmarks/serialization_bench.py [page_size] [repeats]  (best of the repeats is reported)
+"""
+
+import sys
+import os
+import json
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from pydantic import TypeAdapter
+
+# Add the parent directory to the path to import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Nothing here touches the database, but importing the models creates an engine
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from models.database import Coupon
+from schemas.coupon import CouponResponse, PaginatedCouponsResponse
+from api.coupons import _coupon_data, _enhance_coupon_response
+from core.serialization import dumps
+
+def make_coupons(count: int) -> list:
+    now = datetime(2026, 1, 1, 12, 0, 0)
+    return [Coupon(
+        id=i, code=f"CODE{i}", title=f"Coupon {i}", description="benchmark coupon " * 20,
+        discount_type="percent" if i % 2 else "amount", discount_value=Decimal("12.50"),
+        minimum_purchase=Decimal("20.00") if i % 3 else None, maximum_discount=Decimal("15.00"),
+        usage_limit=10 if i % 4 else None, usage_count=i % 10, per_user_limit=None,
+        start_date=now, expiration_date=now + timedelta(days=30 + i),
+        created_at=now, updated_at=now, status="active", store_name="Grocer",
+        category="Food", tags='["grocery", "weekly"]', created_by=1,
+    ) for i in range(count)]
+
+def page(items: list) -> dict:
+    return {"coupons": items, "total": len(items), "page": 1, "per_page": len(items), "total_pages": 1}
+
+def validated(coupons: list) -> bytes:
+    content = PaginatedCouponsResponse(**page([CouponResponse(**_coupon_data(coupon, 1, None)) for coupon in coupons]))
+    # FastAPI validates the returned model against response_model, then serializes it
+    adapter = TypeAdapter(PaginatedCouponsResponse)
+    checked = adapter.validate_python(content.model_dump())
+    return json.dumps(adapter.dump_python(checked, mode="json"), ensure_ascii=False, separators=(",", ":")).encode()
+
+def construct(coupons: list) -> bytes:
+    items = [_enhance_coupon_response(coupon, 1, None) for coupon in coupons]
+    return json.dumps(page([item.model_dump(mode="json") for item in items]), separators=(",", ":")).encode()
+
+def trusted(coupons: list) -> bytes:
+    return dumps(page([_coupon_data(coupon, 1, None) for coupon in coupons]))
+
+def main():
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    coupons = make_coupons(page_size)
+
+    bodies = {fn.__name__: fn(coupons) for fn in (validated, construct, trusted)}
+    reference = json.loads(bodies["validated"])
+    for name, body in bodies.items():
+        assert json.loads(body) == reference, f"{name} output differs"
+
+    print(f"{page_size}-coupon page, {repeats} repeats, {len(bodies['trusted'])} byte body")
+    baseline = None
+    for fn in (validated, construct, trusted):
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn(coupons)
+            timings.append((time.perf_counter() - start) * 1000)
+        best = min(timings)
+        baseline = baseline or best
+        print(f"{fn.__name__:10s} {best:8.3f} ms/page   {baseline / best:5.1f}x")
+
+if __name__ == "__main__":
+    main()
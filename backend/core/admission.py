@@ -0,0 +1,46 @@
+from core.metrics import registry
+
+DB_ADMISSION_ACTIVE = registry.gauge(
+    "db_admission_sessions", "Requests holding or waiting for a database session", ("state",)
+)
+DB_ADMISSION_REJECTED = registry.counter(
+    "db_admission_rejected_total", "Requests shed with 503 because the pool wait queue was full"
+)
+
+class AdmissionController:
+    """Sheds load before it queues on a saturated connection pool.
+
+    ``capacity`` is what the pool can serve at once (pool_size + max_overflow).
+    Requests beyond that wait inside the pool for up to pool_timeout; once
+    ``queue_limit`` of them are already waiting, new ones are rejected straight
+    away instead of piling more latency onto the queue. Counters are only touched
+    from the event loop (FastAPI dependencies), so no locking is needed.
+    """
+
+    def __init__(self, capacity: int, queue_limit: int):
+        self.capacity = capacity
+        self.queue_limit = queue_limit
+        self.active = 0
+
+    @property
+    def waiting(self) -> int:
+        return max(0, self.active - self.capacity)
+
+    def try_acquire(self) -> bool:
+        if self.queue_limit and self.waiting >= self.queue_limit:
+            DB_ADMISSION_REJECTED.inc()
+            return False
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+
+    def stats(self) -> dict:
+        return {
+            ("in_use",): min(self.active, self.capacity),
+            ("waiting",): self.waiting,
+        }
+
+    def register_metrics(self) -> None:
+        DB_ADMISSION_ACTIVE.set_callback(self.stats)
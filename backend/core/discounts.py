@@ -0,0 +1,110 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+CENT = Decimal("0.01")
+NO_CAP = np.iinfo(np.int64).max
+
+def calculate_savings(
+    discount_type: str,
+    discount_value: Decimal,
+    purchase_amount: Decimal,
+    minimum_purchase: Optional[Decimal] = None,
+    maximum_discount: Optional[Decimal] = None,
+) -> Optional[Decimal]:
+    """Amount a coupon saves on ``purchase_amount``, rounded half-up to the cent; None if minimum_purchase is not met"""
+    if minimum_purchase and purchase_amount < minimum_purchase:
+        return None
+    if discount_type == "amount":
+        saved = min(discount_value, purchase_amount)
+    else:  # percent
+        saved = purchase_amount * discount_value / 100
+    if maximum_discount:
+        saved = min(saved, maximum_discount)
+    return saved.quantize(CENT, rounding=ROUND_HALF_UP)
+
+def to_cents(amount: Decimal) -> int:
+    """Whole cents of a two-decimal amount (Numeric(10, 2) values are exact)"""
+    return int(amount * 100)
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(int(cents)).scaleb(-2)
+
+class CouponColumns:
+    """Discount terms of many coupons as parallel int64 numpy arrays.
+
+    Amounts are held in cents and percentages in basis points, so the vectorized
+    arithmetic is exact and rounds exactly like ``calculate_savings``. A missing
+    minimum is stored as 0 and a missing cap as NO_CAP.
+    """
+
+    __slots__ = ("ids", "is_percent", "discount_value", "minimum_purchase", "maximum_discount")
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        is_percent: np.ndarray,
+        discount_value: np.ndarray,
+        minimum_purchase: np.ndarray,
+        maximum_discount: np.ndarray,
+    ):
+        self.ids = ids
+        self.is_percent = is_percent
+        self.discount_value = discount_value
+        self.minimum_purchase = minimum_purchase
+        self.maximum_discount = maximum_discount
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple]) -> "CouponColumns":
+        """Rows of (id, discount_type, discount_value, minimum_purchase, maximum_discount)"""
+        count = len(rows)
+
+        def column(index: int, missing: int) -> np.ndarray:
+            # Falsy minimums and caps mean "none", as in calculate_savings
+            return np.fromiter((to_cents(row[index]) if row[index] else missing for row in rows), dtype=np.int64, count=count)
+
+        return cls(
+            np.fromiter((row[0] for row in rows), dtype=np.int64, count=count),
+            np.fromiter((row[1] == "percent" for row in rows), dtype=bool, count=count),
+            column(2, 0),
+            column(3, 0),
+            column(4, NO_CAP),
+        )
+
+def savings_matrix(columns: CouponColumns, purchase_cents: np.ndarray) -> np.ndarray:
+    """Cents saved by each coupon (rows) on each purchase (columns); -1 where minimum_purchase is not met"""
+    purchase = np.asarray(purchase_cents, dtype=np.int64)[np.newaxis, :]
+    value = columns.discount_value[:, np.newaxis]
+    saved = np.where(
+        columns.is_percent[:, np.newaxis],
+        # cents * basis points / 10000, rounded half-up without leaving integers
+        (purchase * value + 5000) // 10000,
+        np.minimum(value, purchase),
+    )
+    # Capping after rounding is the same as before: the cap is a whole number of cents
+    saved = np.minimum(saved, columns.maximum_discount[:, np.newaxis])
+    return np.where(purchase < columns.minimum_purchase[:, np.newaxis], -1, saved)
+
+def quote_savings(columns: CouponColumns, purchase_amounts: Sequence[Decimal]) -> List[List[Optional[Decimal]]]:
+    """calculate_savings for every coupon and purchase amount, one row per coupon"""
+    if not len(columns):
+        return []
+    saved = savings_matrix(columns, np.array([to_cents(amount) for amount in purchase_amounts], dtype=np.int64))
+    return [[None if cents < 0 else from_cents(cents) for cents in row] for row in saved.tolist()]
+
+def rank_by_savings(columns: CouponColumns, purchase_amount: Decimal, limit: Optional[int] = None) -> List[Tuple[int, Decimal]]:
+    """(coupon_id, amount_saved) of applicable coupons, largest saving first"""
+    if not len(columns):
+        return []
+
+    saved = savings_matrix(columns, np.array([to_cents(purchase_amount)], dtype=np.int64))[:, 0]
+    applicable = np.flatnonzero(saved >= 0)
+    # Stable sort on the negated savings keeps equal savings in input order
+    order = applicable[np.argsort(-saved[applicable], kind="stable")]
+    if limit is not None:
+        order = order[:limit]
+    return [(int(columns.ids[i]), from_cents(saved[i])) for i in order]
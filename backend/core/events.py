@@ -0,0 +1,152 @@
+from typing import Any, Callable, Dict, List, Optional, Set
+import asyncio
+import itertools
+import json
+import logging
+
+import redis.asyncio as aioredis
+
+from core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+EVENT_STREAMS = registry.gauge("event_streams", "Open /coupons/events streams in this worker")
+EVENTS_DROPPED = registry.counter(
+    "event_streams_overflowed_total", "Streams cut off because the client fell a full queue behind"
+)
+
+# Delivered in place of the events a slow client missed; it should refetch and reconnect
+RESYNC = "resync"
+
+class Subscription:
+    """One open event stream: a bounded queue the broker fills and the response drains"""
+
+    __slots__ = ("user_id", "queue")
+
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue: "asyncio.Queue[tuple]" = asyncio.Queue(maxsize=queue_size)
+
+    def offer(self, item: tuple) -> bool:
+        """Queue an event without waiting; on overflow replace the backlog with a resync marker"""
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait((None, RESYNC, {}))
+            return False
+
+class EventBroker:
+    """Fans coupon change events out to the open streams of the user they belong to.
+
+    Publishing never waits on a consumer: each stream has a queue of at most
+    ``queue_size`` events, and a stream that falls that far behind is sent a
+    single ``resync`` event and closed, so memory per connection stays bounded.
+    With ``redis_url`` set, events go through a Redis pub/sub channel so every
+    worker delivers them to its own streams; otherwise they stay in-process.
+    Subscriptions are only touched from the event loop, so no locking is needed.
+    """
+
+    def __init__(self, queue_size: int, max_streams_per_user: int, redis_url: Optional[str] = None, channel: str = "coupon_events"):
+        self.queue_size = queue_size
+        self.max_streams_per_user = max_streams_per_user
+        self.redis_url = redis_url
+        self.channel = channel
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._listeners: List[Callable[[int, str, Dict[str, Any]], None]] = []
+        self._ids = itertools.count(1)
+        self._redis: Optional[aioredis.Redis] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, user_id: int) -> Optional[Subscription]:
+        """A new stream for ``user_id``, or None if they already have max_streams_per_user open"""
+        streams = self._subscriptions.setdefault(user_id, set())
+        if len(streams) >= self.max_streams_per_user:
+            return None
+        subscription = Subscription(user_id, self.queue_size)
+        streams.add(subscription)
+        EVENT_STREAMS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        streams = self._subscriptions.get(subscription.user_id)
+        if streams is None or subscription not in streams:
+            return
+        streams.discard(subscription)
+        if not streams:
+            del self._subscriptions[subscription.user_id]
+        EVENT_STREAMS.dec()
+
+    async def publish(self, user_id: int, event: str, data: Dict[str, Any]) -> None:
+        """Deliver ``event`` to every stream of ``user_id`` across workers"""
+        if self._redis is not None:
+            message = json.dumps({"user_id": user_id, "event": event, "data": data}, default=str)
+            try:
+                await self._redis.publish(self.channel, message)
+                return
+            except aioredis.RedisError as e:
+                logger.warning(f"Event fan-out through Redis failed, delivering locally only: {e}")
+        self.deliver(user_id, event, data)
+
+    def add_listener(self, listener: Callable[[int, str, Dict[str, Any]], None]) -> None:
+        """Also pass every event, for any user, to ``listener(user_id, event, data)`` on the event loop"""
+        self._listeners.append(listener)
+
+    def deliver(self, user_id: int, event: str, data: Dict[str, Any]) -> None:
+        """Queue an event on this worker's streams for ``user_id``"""
+        for listener in self._listeners:
+            listener(user_id, event, data)
+        streams = self._subscriptions.get(user_id)
+        if not streams:
+            return
+        item = (next(self._ids), event, data)
+        for subscription in list(streams):
+            if not subscription.offer(item):
+                EVENTS_DROPPED.inc()
+                self.unsubscribe(subscription)
+
+    async def start(self) -> None:
+        if not self.redis_url:
+            return
+        self._redis = aioredis.from_url(self.redis_url)
+        self._listener = asyncio.create_task(self._listen())
+        logger.info(f"Coupon events fanned out through Redis channel {self.channel}")
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def _listen(self) -> None:
+        """Deliver events published by any worker; resubscribes if Redis goes away"""
+        while True:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    payload = json.loads(message["data"])
+                    self.deliver(payload["user_id"], payload["event"], payload["data"])
+            except aioredis.RedisError as e:
+                logger.warning(f"Lost Redis event subscription, retrying: {e}")
+            finally:
+                try:
+                    await pubsub.aclose()
+                except aioredis.RedisError:
+                    pass
+            await asyncio.sleep(1)
+
+def format_event(event_id: Optional[int], event: str, data: Dict[str, Any]) -> str:
+    """One Server-Sent Events message"""
+    lines = [] if event_id is None else [f"id: {event_id}"]
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,230 @@
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, Dict, NamedTuple, Optional
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import time
+
+from models.database import SessionLocal, Job, utcnow
+from core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+JOB_RUNS = registry.counter("jobs_total", "Background job runs by outcome", ("kind", "outcome"))
+JOB_DURATION = registry.histogram("job_duration_seconds", "Background job run time", ("kind",))
+
+# A running job whose worker has not finished it within this long is handed to another worker
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "600"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+JOBS_ENABLED = os.getenv("JOBS_ENABLED", "true").lower() == "true"
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "1"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+
+_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+class JobSpec(NamedTuple):
+    handler: Callable[[Session, Dict[str, Any]], None]
+    max_attempts: int
+    every: Optional[timedelta]
+
+JOB_HANDLERS: Dict[str, JobSpec] = {}
+
+class JobRun(NamedTuple):
+    kind: str
+    outcome: str  # done, retry or failed
+    duration: float
+
+def job(kind: str, max_attempts: int = 5, every: Optional[timedelta] = None):
+    """Register ``fn(session, payload)`` as the handler for ``kind``; ``every`` makes it periodic.
+
+    The handler's changes are committed in the same transaction that marks the
+    job done, so a job that fails or is retried leaves nothing half-applied.
+    """
+    def register(fn):
+        JOB_HANDLERS[kind] = JobSpec(fn, max_attempts, every)
+        return fn
+    return register
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Optional[Dict[str, Any]] = None,
+    key: Optional[str] = None,
+    run_at: Optional[datetime] = None,
+) -> None:
+    """Queue a job inside the caller's transaction; a queued job with the same ``key`` absorbs it"""
+    values = dict(
+        kind=kind,
+        payload=json.dumps(payload) if payload else None,
+        key=key,
+        status="queued",
+        attempts=0,
+        max_attempts=JOB_HANDLERS[kind].max_attempts if kind in JOB_HANDLERS else 5,
+        run_at=run_at or utcnow(),
+        created_at=utcnow(),
+    )
+    insert = _INSERTS.get(db.get_bind().dialect.name)
+    if key is None or insert is None:
+        if key is not None and db.query(Job.id).filter(Job.key == key, Job.status == "queued").first():
+            return
+        db.add(Job(**values))
+        return
+    db.execute(insert(Job).values(**values).on_conflict_do_nothing(
+        index_elements=["key"], index_where=Job.status == "queued"
+    ))
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter, capped at JOB_RETRY_MAX_SECONDS"""
+    return random.uniform(0, min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1)))
+
+def claim_job(db: Session, worker_id: str) -> Optional[Job]:
+    """Take the oldest due job (or one whose lease expired) for this worker"""
+    now = utcnow()
+    claimable = or_(
+        and_(Job.status == "queued", Job.run_at <= now),
+        and_(Job.status == "running", Job.locked_at < now - timedelta(seconds=JOB_LEASE_SECONDS)),
+    )
+    # SKIP LOCKED lets concurrent workers pass over rows another worker is claiming (PostgreSQL)
+    job_id = db.query(Job.id).filter(claimable).order_by(Job.run_at).limit(1).with_for_update(skip_locked=True).scalar()
+    if job_id is None:
+        db.rollback()
+        return None
+    # The status check makes the claim safe where SKIP LOCKED is not available (SQLite)
+    claimed = db.query(Job).filter(Job.id == job_id, claimable).update({
+        Job.status: "running",
+        Job.locked_at: now,
+        Job.locked_by: worker_id,
+        Job.attempts: Job.attempts + 1,
+    }, synchronize_session=False)
+    db.commit()
+    if not claimed:
+        return None
+    return db.get(Job, job_id)
+
+def run_job(job_id: int, worker_id: str) -> JobRun:
+    """Run a claimed job and record its outcome in the jobs table (sync; call on the threadpool).
+
+    Metrics are left to the caller, which updates them on the event loop (see core.metrics).
+    """
+    db = SessionLocal()
+    try:
+        job = db.get(Job, job_id)
+        spec = JOB_HANDLERS.get(job.kind)
+        started = time.perf_counter()
+        try:
+            if spec is None:
+                raise LookupError(f"No handler registered for job kind '{job.kind}'")
+            spec.handler(db, json.loads(job.payload) if job.payload else {})
+            db.flush()
+        except Exception as e:
+            db.rollback()
+            _record_failure(db, job, spec, e)
+            outcome = "retry" if job.status == "queued" else "failed"
+        else:
+            job.status = "done"
+            job.finished_at = utcnow()
+            job.last_error = None
+            _schedule_next(db, job, spec)
+            outcome = "done"
+        db.commit()
+        return JobRun(job.kind, outcome, time.perf_counter() - started)
+    finally:
+        db.close()
+
+def _record_failure(db: Session, job: Job, spec: Optional[JobSpec], error: Exception) -> None:
+    job.last_error = f"{type(error).__name__}: {error}"
+    superseded = job.key is not None and db.query(Job.id).filter(
+        Job.key == job.key, Job.status == "queued", Job.id != job.id
+    ).first() is not None
+    if spec is not None and job.attempts < job.max_attempts and not superseded:
+        job.status = "queued"
+        job.run_at = utcnow() + timedelta(seconds=retry_delay(job.attempts))
+        logger.warning(f"Job {job.id} ({job.kind}) failed, attempt {job.attempts}/{job.max_attempts}: {job.last_error}")
+        return
+    job.status = "failed"
+    job.finished_at = utcnow()
+    _schedule_next(db, job, spec)
+    logger.error(f"Job {job.id} ({job.kind}) failed permanently: {job.last_error}")
+
+def _schedule_next(db: Session, job: Job, spec: Optional[JobSpec]) -> None:
+    if spec is not None and spec.every is not None:
+        enqueue(db, job.kind, key=job.kind, run_at=utcnow() + spec.every)
+
+@job("jobs.purge", every=timedelta(days=1))
+def purge_finished_jobs(db: Session, payload: Dict[str, Any]) -> None:
+    cutoff = utcnow() - timedelta(days=JOB_RETENTION_DAYS)
+    deleted = db.query(Job).filter(Job.status.in_(("done", "failed")), Job.finished_at < cutoff).delete(synchronize_session=False)
+    logger.info(f"Purged {deleted} finished jobs")
+
+class JobWorker:
+    """Runs queued jobs on ``concurrency`` coroutines, each handing one job at a time to the threadpool"""
+
+    def __init__(self, concurrency: int, poll_interval: float):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._tasks = []
+
+    async def start(self) -> None:
+        await run_in_threadpool(self._ensure_periodic)
+        self._tasks = [asyncio.create_task(self._loop(index)) for index in range(self.concurrency)]
+        logger.info(f"Started {self.concurrency} background job workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _ensure_periodic(self) -> None:
+        db = SessionLocal()
+        try:
+            for kind, spec in JOB_HANDLERS.items():
+                if spec.every is not None:
+                    enqueue(db, kind, key=kind)
+            db.commit()
+        finally:
+            db.close()
+
+    def _claim(self, worker_id: str) -> Optional[int]:
+        db = SessionLocal()
+        try:
+            job = claim_job(db, worker_id)
+            return job.id if job is not None else None
+        finally:
+            db.close()
+
+    async def _loop(self, index: int) -> None:
+        worker_id = f"{self.worker_id}:{index}"
+        # Spread the workers' polls out
+        await asyncio.sleep(self.poll_interval * index / max(self.concurrency, 1))
+        while True:
+            try:
+                job_id = await run_in_threadpool(self._claim, worker_id)
+                if job_id is None:
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+                run = await run_in_threadpool(run_job, job_id, worker_id)
+                JOB_RUNS.inc(run.kind, run.outcome)
+                JOB_DURATION.observe(run.duration, run.kind)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Background job worker {worker_id} failed: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+def create_job_worker() -> Optional[JobWorker]:
+    """JobWorker configured from the environment, or None when this process should not run jobs"""
+    if not JOBS_ENABLED or JOB_WORKERS <= 0:
+        return None
+    return JobWorker(JOB_WORKERS, JOB_POLL_SECONDS)
@@ -0,0 +1,157 @@
+from logging.handlers import QueueHandler, QueueListener
+from datetime import datetime, timezone
+from typing import Optional
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+
+try:
+    import orjson
+
+    def _dumps(data: dict) -> str:
+        return orjson.dumps(data, default=str).decode()
+except ImportError:  # pragma: no cover - orjson is optional
+    import json
+
+    def _dumps(data: dict) -> str:
+        return json.dumps(data, default=str, separators=(",", ":"))
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")  # json or text
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Fraction of successful (< 400) requests that get an access log line; errors are always logged
+LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("LOG_SUCCESS_SAMPLE_RATE", "1.0"))
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Loggers configured by uvicorn with their own synchronous handlers
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+# Query parameters whose values never reach the logs (e.g. ?access_token= on EventSource connects)
+_SENSITIVE_QUERY_RE = re.compile(r"((?:^|[?&])[^=&?]*(?:token|secret|password|api_?key)[^=&?]*=)[^&]*", re.IGNORECASE)
+
+def redact_query(query: str) -> str:
+    """Replace the values of token-like query parameters in a query string or path with [REDACTED]"""
+    return _SENSITIVE_QUERY_RE.sub(r"\1[REDACTED]", query)
+
+class RedactAccessLogFilter(logging.Filter):
+    """Redact token-like query parameters from uvicorn access log lines"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # uvicorn.access args: (client_addr, method, full_path, http_version, status_code)
+        if isinstance(record.args, tuple) and len(record.args) >= 3 and isinstance(record.args[2], str):
+            record.args = record.args[:2] + (redact_query(record.args[2]),) + record.args[3:]
+        return True
+
+class JSONFormatter(logging.Formatter):
+    """Render records as single-line JSON, merging structured ``fields`` passed via ``extra``"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        fields = getattr(record, "fields", None)
+        if fields:
+            data.update(fields)
+
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+
+        return _dumps(data)
+
+class TextFormatter(logging.Formatter):
+    """Plain text format with structured ``fields`` appended as JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            message = f"{message} {_dumps(fields)}"
+        return message
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller and defers formatting to the listener thread.
+
+    The stock handler formats each record on the calling thread; here only the
+    message arguments are merged. When the queue is full the record is dropped
+    and counted instead of waiting for the writer to catch up.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        # Records are logged from the event loop and worker threads alike
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+
+def configure_logging() -> QueueListener:
+    """Route all logging through an in-memory queue drained by a background thread"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _listener
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JSONFormatter() if LOG_FORMAT == "json" else TextFormatter(TEXT_FORMAT))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    if _queue_handler is not None:
+        # Reconfigured after shutdown_logging: keep the total monotonic
+        queue_handler.dropped = _queue_handler.dropped
+    _queue_handler = queue_handler
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(LOG_LEVEL)
+
+    for name in UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+    access_logger = logging.getLogger("uvicorn.access")
+    if not any(isinstance(f, RedactAccessLogFilter) for f in access_logger.filters):
+        access_logger.addFilter(RedactAccessLogFilter())
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def dropped_records() -> int:
+    """Records dropped so far because the log queue was full"""
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def sample_success() -> bool:
+    """Decide whether a successful request should be logged"""
+    if LOG_SUCCESS_SAMPLE_RATE >= 1.0:
+        return True
+    return random.random() < LOG_SUCCESS_SAMPLE_RATE
@@ -0,0 +1,250 @@
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import math
+
+# Latency buckets in seconds, tuned for an API whose typical request is a few ms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Metric:
+    """Base class for a metric family keyed by a fixed tuple of label names.
+
+    Series are plain Python numbers/lists updated in place without locks. All
+    request-path updates happen on the event loop thread, so increments never
+    interleave; a scrape only reads, so it cannot perturb the values it reports.
+    """
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+            *self.collect(),
+        ]
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback: Optional[Callable[[], Dict[LabelValues, float]]] = None
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        values = self._values
+        values[labels] = values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def set_callback(self, callback: Callable[[], Dict[LabelValues, float]]) -> None:
+        """Read a total kept elsewhere (e.g. by another thread) at scrape time"""
+        self._callback = callback
+
+    def collect(self) -> List[str]:
+        values = self._callback() if self._callback else self._values
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in list(values.items())
+        ]
+
+class Gauge(Metric):
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        callback: Optional[Callable[[], Dict[LabelValues, float]]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        values = self._values
+        values[labels] = values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def set_callback(self, callback: Callable[[], Dict[LabelValues, float]]) -> None:
+        """Compute the gauge at scrape time instead of tracking it on the hot path"""
+        self._callback = callback
+
+    def collect(self) -> List[str]:
+        values = self._callback() if self._callback else self._values
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in list(values.items())
+        ]
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: [count per bucket (+Inf last)..., sum]
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def collect(self) -> List[str]:
+        lines = []
+        bounds = self.buckets + (math.inf,)
+        for labels, series in list(self._series.items()):
+            snapshot = list(series)
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, snapshot):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {int(cumulative)}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(snapshot[-1])}")
+            lines.append(f"{self.name}_count{label_str} {int(cumulative)}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+# HTTP
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "Total HTTP requests by route template and status", ("method", "route", "status")
+)
+HTTP_LATENCY = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+)
+HTTP_IN_FLIGHT = registry.gauge("http_requests_in_flight", "HTTP requests currently being served")
+
+# Database connection pool (sampled at scrape time)
+DB_POOL = registry.gauge("db_pool_connections", "Database pool connections by state", ("engine", "state"))
+
+# Password hashing
+ARGON2_IN_PROGRESS = registry.gauge(
+    "argon2_operations_in_progress", "Argon2 hash/verify operations queued or running", ("operation",)
+)
+ARGON2_LATENCY = registry.histogram(
+    "argon2_operation_duration_seconds", "Argon2 hash/verify latency", ("operation",),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
+
+# Caches
+CACHE_REQUESTS = registry.counter("cache_requests_total", "Cache lookups by cache and result", ("cache", "result"))
+CACHE_HIT_RATIO = registry.gauge("cache_hit_ratio", "Cache hit ratio since process start", ("cache",))
+
+def record_cache(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache, "hit" if hit else "miss")
+
+def _cache_hit_ratios() -> Dict[LabelValues, float]:
+    totals: Dict[str, List[float]] = {}
+    for (cache, result), value in list(CACHE_REQUESTS._values.items()):
+        hits_and_total = totals.setdefault(cache, [0, 0])
+        if result == "hit":
+            hits_and_total[0] += value
+        hits_and_total[1] += value
+    return {(cache,): hits / total for cache, (hits, total) in totals.items() if total}
+
+CACHE_HIT_RATIO.set_callback(_cache_hit_ratios)
+
+# Logging (read from the log queue handler at scrape time)
+LOG_DROPPED = registry.counter(
+    "logging_dropped_records_total", "Log records dropped because the log queue was full"
+)
+
+def register_log_drops(dropped: Callable[[], int]) -> None:
+    """Expose the log queue's dropped-record count under logging_dropped_records_total"""
+    LOG_DROPPED.set_callback(lambda: {(): dropped()})
+
+_pool_engines: Dict[str, object] = {}
+
+def register_engine(name: str, engine) -> None:
+    """Expose an SQLAlchemy engine's pool occupancy under db_pool_connections{engine=name}"""
+    _pool_engines[name] = engine
+    DB_POOL.set_callback(_pool_stats)
+
+def _pool_stats() -> Dict[LabelValues, float]:
+    stats: Dict[LabelValues, float] = {}
+    for name, engine in list(_pool_engines.items()):
+        pool = getattr(engine, "pool", None)
+        for state, method in (("size", "size"), ("checked_out", "checkedout"), ("checked_in", "checkedin"), ("overflow", "overflow")):
+            getter = getattr(pool, method, None)
+            if getter is not None:
+                stats[(name, state)] = getter()
+    return stats
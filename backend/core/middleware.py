@@ -1,261 +1,275 @@
-from fastapi import Request, Response
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import unquote_plus
 import logging
 import time
 import uuid
-from typing import Callable
-import json
+
+from core.logging_config import redact_query, sample_success
+from core.metrics import HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS
+from core.query_stats import QueryStats, begin_tracking, record_request
 
 logger = logging.getLogger(__name__)
 
-class SecurityMiddleware(BaseHTTPMiddleware):
-    """Enhanced security middleware with comprehensive protections"""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Generate request ID for tracking
+# Patterns that indicate SQL injection / XSS probing
+SUSPICIOUS_PATTERNS = (
+    "union select", "drop table", "delete from", "update set",
+    "insert into", "'; --", "' or 1=1", "' or '1'='1",
+    "<script", "javascript:", "onload=", "onerror="
+)
+
+SUSPICIOUS_AGENTS = ("sqlmap", "nmap", "nikto", "burp", "zap")
+
+MAX_URL_LENGTH = 2048
+
+DEFAULT_CSP = (
+    "default-src 'self'; "
+    "script-src 'self' 'unsafe-inline'; "
+    "style-src 'self' 'unsafe-inline'; "
+    "img-src 'self' data: https:; "
+    "font-src 'self'; "
+    "connect-src 'self'; "
+    "frame-ancestors 'none';"
+)
+
+def get_client_ip(scope: Scope, headers: Headers) -> str:
+    """Extract real client IP considering proxy headers"""
+    forwarded_for = headers.get("x-forwarded-for")
+    if forwarded_for:
+        # Take the first IP (original client)
+        return forwarded_for.split(',')[0].strip()
+
+    real_ip = headers.get("x-real-ip")
+    if real_ip:
+        return real_ip.strip()
+
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+def get_route_template(scope: Scope) -> str:
+    """Matched route template (e.g. /api/v1/coupons/{coupon_id}), keeping metric labels low-cardinality"""
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if not path:
+        return "<unmatched>"
+
+    # Newer FastAPI versions keep the include_router prefix outside the route itself
+    included_router = scope.get("fastapi", {}).get("included_router")
+    prefix = getattr(getattr(included_router, "include_context", None), "prefix", "")
+    if prefix and not path.startswith(prefix):
+        path = prefix + path
+    return path
+
+class RequestMiddleware:
+    """Pure ASGI middleware combining request tracking, filtering, rate limiting and security headers.
+
+    Headers are injected by wrapping ``send`` so response bodies are never
+    buffered and streaming responses pass straight through.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        block_suspicious: bool = True,
+        calls_per_minute: Optional[int] = None,
+        content_security_policy: Optional[str] = None,
+        hsts: bool = False,
+        expose_query_stats: bool = False,
+    ):
+        self.app = app
+        self.block_suspicious = block_suspicious
+        self.expose_query_stats = expose_query_stats
+        self.calls_per_minute = calls_per_minute
+        self.client_requests: Dict[str, Deque[float]] = {}  # In production, use Redis
+
+        # Static headers are encoded once instead of on every response
+        security_headers = {
+            "X-Content-Type-Options": "nosniff",
+            "X-Frame-Options": "DENY",
+            "X-XSS-Protection": "1; mode=block",
+            "Referrer-Policy": "strict-origin-when-cross-origin",
+            "Permissions-Policy": "geolocation=(), microphone=(), camera=()",
+        }
+        if content_security_policy:
+            security_headers["Content-Security-Policy"] = content_security_policy
+        if hsts:
+            security_headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+
+        self.static_headers: List[Tuple[bytes, bytes]] = [
+            (name.lower().encode("latin-1"), value.encode("latin-1"))
+            for name, value in security_headers.items()
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+
+        # Generate request ID for tracking, exposed as request.state.request_id
         request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
-        
-        # Log request details (without sensitive data)
-        start_time = time.time()
-        client_ip = self._get_client_ip(request)
-        
-        logger.info(f"Request {request_id}: {request.method} {request.url.path} from {client_ip}")
-        
+        scope.setdefault("state", {})["request_id"] = request_id
+
+        headers = Headers(scope=scope)
+        client_ip = get_client_ip(scope, headers)
+
         # Check for suspicious patterns
-        if self._is_suspicious_request(request):
+        if self.block_suspicious and self._is_suspicious_request(scope, headers):
             logger.warning(f"Suspicious request detected: {request_id} from {client_ip}")
-            return JSONResponse(
-                status_code=400,
-                content={"error": "Bad request"}
-            )
-        
-        # Process request
+            response = JSONResponse(status_code=400, content={"error": "Bad request"})
+            await response(scope, receive, send)
+            return
+
+        # Check rate limit
+        rate_limit_headers: List[Tuple[bytes, bytes]] = []
+        if self.calls_per_minute:
+            rate_limit_headers, limited = self._check_rate_limit(client_ip)
+            if limited:
+                logger.warning(f"Rate limit exceeded for {client_ip}")
+                response = JSONResponse(
+                    status_code=429,
+                    content={"error": "Rate limit exceeded", "retry_after": 60},
+                )
+                response.raw_headers.extend(rate_limit_headers)
+                response.raw_headers.append((b"retry-after", b"60"))
+                await response(scope, receive, send)
+                return
+
+        extra_headers = self.static_headers + rate_limit_headers
+        extra_headers.append((b"x-request-id", request_id.encode("latin-1")))
+
+        query_stats = begin_tracking()
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                process_time = time.perf_counter() - start_time
+                raw_headers = list(message.get("headers", ()))
+                raw_headers.extend(extra_headers)
+                raw_headers.append((b"x-process-time", str(process_time).encode("latin-1")))
+                if self.expose_query_stats:
+                    raw_headers.append((b"x-db-query-count", str(query_stats.count).encode("latin-1")))
+                    raw_headers.append((b"x-db-time", f"{query_stats.total_time:.6f}".encode("latin-1")))
+                message["headers"] = raw_headers
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
         try:
-            response = await call_next(request)
-            
-            # Add security headers
-            self._add_security_headers(response)
-            
-            # Log response
-            process_time = time.time() - start_time
-            logger.info(f"Request {request_id} completed in {process_time:.3f}s with status {response.status_code}")
-            
-            return response
-            
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            process_time = time.time() - start_time
-            logger.error(f"Request {request_id} failed after {process_time:.3f}s: {str(e)}")
-            
-            return JSONResponse(
-                status_code=500,
-                content={"error": "Internal server error"}
+            # Left to the app's 500 handler, which renders the error response
+            process_time = time.perf_counter() - start_time
+            self._record_metrics(scope, 500, process_time, query_stats)
+            logger.error(
+                f"Request {request_id} failed: {str(e)}",
+                extra={"fields": self._log_fields(scope, headers, client_ip, request_id, 500, process_time, response_size, query_stats)}
             )
-    
-    def _get_client_ip(self, request: Request) -> str:
-        """Extract real client IP considering proxy headers"""
-        # Check X-Forwarded-For header
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            # Take the first IP (original client)
-            return forwarded_for.split(',')[0].strip()
-        
-        # Check X-Real-IP header
-        real_ip = request.headers.get("X-Real-IP")
-        if real_ip:
-            return real_ip.strip()
-        
-        # Fallback to direct connection IP
-        return request.client.host if request.client else "unknown"
-    
-    def _is_suspicious_request(self, request: Request) -> bool:
+            raise
+        finally:
+            HTTP_IN_FLIGHT.dec()
+
+        process_time = time.perf_counter() - start_time
+        self._record_metrics(scope, status_code, process_time, query_stats)
+
+        # Errors are always logged, successful requests are sampled
+        if status_code < 400 and not sample_success():
+            return
+
+        fields = self._log_fields(scope, headers, client_ip, request_id, status_code, process_time, response_size, query_stats)
+        if status_code >= 500:
+            logger.error("Server Error", extra={"fields": fields})
+        elif status_code >= 400:
+            logger.warning("Client Error", extra={"fields": fields})
+        else:
+            logger.info("Success", extra={"fields": fields})
+
+    def _record_metrics(self, scope: Scope, status_code: int, process_time: float, query_stats: QueryStats) -> None:
+        """Record per-route counters keyed by the matched route template, not the raw path"""
+        route_path = get_route_template(scope)
+        method = scope["method"]
+        HTTP_REQUESTS.inc(method, route_path, str(status_code))
+        HTTP_LATENCY.observe(process_time, method, route_path)
+        record_request(query_stats, route_path)
+
+    def _log_fields(
+        self,
+        scope: Scope,
+        headers: Headers,
+        client_ip: str,
+        request_id: str,
+        status_code: int,
+        process_time: float,
+        response_size: int,
+        query_stats: QueryStats,
+    ) -> dict:
+        """Structured access log fields (no headers beyond user agent, token-like query values redacted)"""
+        return {
+            "request_id": request_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": redact_query(scope.get("query_string", b"").decode("latin-1")),
+            "client_ip": client_ip,
+            "user_agent": headers.get("user-agent", ""),
+            "status_code": status_code,
+            "process_time_ms": round(process_time * 1000, 2),
+            "response_size": response_size,
+            "db_queries": query_stats.count,
+            "db_time_ms": round(query_stats.total_time * 1000, 2),
+        }
+
+    def _is_suspicious_request(self, scope: Scope, headers: Headers) -> bool:
         """Detect potentially malicious requests"""
-        
-        # Check for SQL injection patterns
-        suspicious_patterns = [
-            "union select", "drop table", "delete from", "update set",
-            "insert into", "'; --", "' or 1=1", "' or '1'='1",
-            "<script", "javascript:", "onload=", "onerror="
-        ]
-        
-        # Check URL path
-        path_lower = request.url.path.lower()
-        for pattern in suspicious_patterns:
-            if pattern in path_lower:
-                return True
-        
-        # Check query parameters
-        for key, value in request.query_params.items():
-            value_lower = str(value).lower()
-            for pattern in suspicious_patterns:
-                if pattern in value_lower:
-                    return True
-        
+        path_lower = scope["path"].lower()
+        query_string = scope.get("query_string", b"")
+
         # Check for overly long URLs (potential buffer overflow)
-        if len(str(request.url)) > 2048:
+        if len(scope.get("raw_path") or path_lower) + len(query_string) > MAX_URL_LENGTH:
             return True
-        
-        # Check for suspicious user agents
-        user_agent = request.headers.get("user-agent", "").lower()
-        suspicious_agents = ["sqlmap", "nmap", "nikto", "burp", "zap"]
-        for agent in suspicious_agents:
-            if agent in user_agent:
+
+        # Check URL path and query parameters
+        query_lower = unquote_plus(query_string.decode("latin-1")).lower() if query_string else ""
+        for pattern in SUSPICIOUS_PATTERNS:
+            if pattern in path_lower or pattern in query_lower:
                 return True
-        
+
+        # Check for suspicious user agents
+        user_agent = headers.get("user-agent", "").lower()
+        if user_agent:
+            for agent in SUSPICIOUS_AGENTS:
+                if agent in user_agent:
+                    return True
+
         return False
-    
-    def _add_security_headers(self, response: Response) -> None:
-        """Add comprehensive security headers"""
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-        response.headers["X-Request-ID"] = getattr(response, 'request_id', 'unknown')
-        
-        # Content Security Policy
-        csp = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline'; "
-            "style-src 'self' 'unsafe-inline'; "
-            "img-src 'self' data: https:; "
-            "font-src 'self'; "
-            "connect-src 'self'; "
-            "frame-ancestors 'none';"
-        )
-        response.headers["Content-Security-Policy"] = csp
-
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Comprehensive request logging middleware"""
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.time()
-        
-        # Extract request information
-        request_data = {
-            "method": request.method,
-            "url": str(request.url),
-            "path": request.url.path,
-            "query_params": dict(request.query_params),
-            "headers": dict(request.headers),
-            "client_ip": self._get_client_ip(request),
-            "user_agent": request.headers.get("user-agent", ""),
-            "request_id": getattr(request.state, 'request_id', str(uuid.uuid4()))
-        }
-        
-        # Remove sensitive headers from logging
-        sensitive_headers = {"authorization", "cookie", "x-api-key"}
-        for header in sensitive_headers:
-            if header in request_data["headers"]:
-                request_data["headers"][header] = "[REDACTED]"
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate processing time
-        process_time = time.time() - start_time
-        
-        # Log request/response details
-        log_data = {
-            **request_data,
-            "status_code": response.status_code,
-            "process_time_ms": round(process_time * 1000, 2),
-            "response_size": response.headers.get("content-length", "unknown")
-        }
-        
-        # Log level based on status code
-        if response.status_code >= 500:
-            logger.error(f"Server Error: {json.dumps(log_data)}")
-        elif response.status_code >= 400:
-            logger.warning(f"Client Error: {json.dumps(log_data)}")
-        else:
-            logger.info(f"Success: {json.dumps(log_data)}")
-        
-        # Add processing time header
-        response.headers["X-Process-Time"] = str(process_time)
-        
-        return response
-    
-    def _get_client_ip(self, request: Request) -> str:
-        """Extract real client IP considering proxy headers"""
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            return forwarded_for.split(',')[0].strip()
-        
-        real_ip = request.headers.get("X-Real-IP")
-        if real_ip:
-            return real_ip.strip()
-        
-        return request.client.host if request.client else "unknown"
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Advanced rate limiting middleware"""
-    
-    def __init__(self, app, calls_per_minute: int = 60, burst_size: int = 10):
-        super().__init__(app)
-        self.calls_per_minute = calls_per_minute
-        self.burst_size = burst_size
-        self.client_requests = {}  # In production, use Redis
-    
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        client_ip = self._get_client_ip(request)
+
+    def _check_rate_limit(self, client_ip: str) -> Tuple[List[Tuple[bytes, bytes]], bool]:
+        """Sliding one-minute window per client IP"""
         current_time = time.time()
-        
-        # Initialize client tracking
-        if client_ip not in self.client_requests:
-            self.client_requests[client_ip] = {
-                "requests": [],
-                "burst_count": 0,
-                "last_request": current_time
-            }
-        
-        client_data = self.client_requests[client_ip]
-        
-        # Clean old requests (older than 1 minute)
+        requests = self.client_requests.get(client_ip)
+        if requests is None:
+            requests = self.client_requests[client_ip] = deque()
+
+        # Drop requests older than 1 minute
         minute_ago = current_time - 60
-        client_data["requests"] = [req_time for req_time in client_data["requests"] if req_time > minute_ago]
-        
-        # Check rate limit
-        if len(client_data["requests"]) >= self.calls_per_minute:
-            logger.warning(f"Rate limit exceeded for {client_ip}")
-            return JSONResponse(
-                status_code=429,
-                content={
-                    "error": "Rate limit exceeded",
-                    "retry_after": 60
-                },
-                headers={
-                    "Retry-After": "60",
-                    "X-RateLimit-Limit": str(self.calls_per_minute),
-                    "X-RateLimit-Remaining": "0",
-                    "X-RateLimit-Reset": str(int(current_time + 60))
-                }
-            )
-        
-        # Add current request
-        client_data["requests"].append(current_time)
-        client_data["last_request"] = current_time
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Add rate limit headers
-        remaining = max(0, self.calls_per_minute - len(client_data["requests"]))
-        response.headers["X-RateLimit-Limit"] = str(self.calls_per_minute)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(int(current_time + 60))
-        
-        return response
-    
-    def _get_client_ip(self, request: Request) -> str:
-        """Extract real client IP considering proxy headers"""
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            return forwarded_for.split(',')[0].strip()
-        
-        real_ip = request.headers.get("X-Real-IP")
-        if real_ip:
-            return real_ip.strip()
-        
-        return request.client.host if request.client else "unknown"
\ No newline at end of file
+        while requests and requests[0] <= minute_ago:
+            requests.popleft()
+
+        limited = len(requests) >= self.calls_per_minute
+        if not limited:
+            requests.append(current_time)
+
+        remaining = max(0, self.calls_per_minute - len(requests))
+        headers = [
+            (b"x-ratelimit-limit", str(self.calls_per_minute).encode("latin-1")),
+            (b"x-ratelimit-remaining", str(remaining).encode("latin-1")),
+            (b"x-ratelimit-reset", str(int(current_time + 60)).encode("latin-1")),
+        ]
+        return headers, limited
@@ -0,0 +1,205 @@
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Optional
+import asyncio
+import cProfile
+import itertools
+import logging
+import os
+import re
+import sys
+import threading
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "temp/profiles")
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))  # seconds
+PROFILE_EVERY_N = int(os.getenv("PROFILE_EVERY_N", "0"))  # 0 disables background sampling
+
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY_PARAM = "profile"
+PROFILE_MODES = ("sample", "cprofile")
+
+_SLUG_RE = re.compile(r"[^a-zA-Z0-9]+")
+
+class StackSampler:
+    """Sampling profiler producing folded stacks (``a;b;c count``) for flamegraph.pl / speedscope.
+
+    Samples the thread that serves the request. Under asyncio that thread is the
+    event loop, so concurrent requests interleaved with this one appear too.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._fold(frame)] += 1
+
+    @staticmethod
+    def _fold(frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def render(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class ProfilingMiddleware:
+    """Profile individual requests on demand (admins only) or one in every N requests.
+
+    Admins opt in with ``X-Profile: sample|cprofile`` or ``?profile=sample|cprofile``.
+    Profiles are written to PROFILE_DIR (folded stacks or pstats), the newest
+    PROFILE_MAX_FILES are kept, and the file name is returned in ``X-Profile-File``.
+
+    One request is profiled at a time: an admin asking while another profile runs
+    gets 409, and a background sample is skipped. Both modes only see the event
+    loop thread, so work the route hands to the threadpool (``AsyncDB.run``,
+    ``run_in_threadpool``) shows up as time spent awaiting it, not as its own frames.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        authorize: Callable[[str], bool],
+        every_n: int = PROFILE_EVERY_N,
+        profile_dir: str = PROFILE_DIR,
+        max_files: int = PROFILE_MAX_FILES,
+    ):
+        self.app = app
+        self.authorize = authorize
+        self.every_n = every_n
+        self.profile_dir = profile_dir
+        self.max_files = max_files
+        self._counter = itertools.count(1)
+        self._busy = asyncio.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = await self._requested_mode(scope)
+        mode = requested
+        if mode is None and self.every_n and next(self._counter) % self.every_n == 0:
+            mode = "sample"
+
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Both profilers watch the event loop thread, so a second profile would mix the
+        # two requests (and cProfile.enable() refuses a second profiler on Python 3.12+)
+        if self._busy.locked():
+            if requested is None:
+                await self.app(scope, receive, send)
+                return
+            response = JSONResponse(
+                {"detail": "Another request is being profiled, retry shortly"},
+                status_code=409,
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+
+        async with self._busy:
+            await self._profile(mode, scope, receive, send)
+
+    async def _requested_mode(self, scope: Scope) -> Optional[str]:
+        """Profiling mode requested by the client, honoured only for admin tokens"""
+        headers = Headers(scope=scope)
+        mode = headers.get(PROFILE_HEADER)
+        if mode is None and scope.get("query_string"):
+            mode = QueryParams(scope["query_string"]).get(PROFILE_QUERY_PARAM)
+        if not mode:
+            return None
+
+        mode = mode.lower()
+        if mode not in PROFILE_MODES:
+            mode = "sample"
+
+        authorization = headers.get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None
+
+        # Non-admin requests are served normally, without revealing the feature
+        if not await run_in_threadpool(self.authorize, token):
+            return None
+        return mode
+
+    async def _profile(self, mode: str, scope: Scope, receive: Receive, send: Send) -> None:
+        request_id = scope.get("state", {}).get("request_id", "")
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        slug = _SLUG_RE.sub("-", scope["path"]).strip("-") or "root"
+        extension = "folded" if mode == "sample" else "pstats"
+        filename = f"{timestamp}-{scope['method']}-{slug}-{request_id[:8]}.{extension}"
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", ())) + [
+                    (b"x-profile-file", filename.encode("latin-1"))
+                ]
+            await send(message)
+
+        if mode == "sample":
+            profiler = StackSampler(threading.get_ident())
+            profiler.start()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.stop()
+            await run_in_threadpool(self._write, filename, profiler.render())
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+            await run_in_threadpool(self._write_stats, filename, profiler)
+
+    def _write(self, filename: str, content: str) -> None:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        with open(os.path.join(self.profile_dir, filename), "w") as f:
+            f.write(content)
+        self._rotate()
+
+    def _write_stats(self, filename: str, profiler: cProfile.Profile) -> None:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(self.profile_dir, filename))
+        self._rotate()
+
+    def _rotate(self) -> None:
+        """Keep only the newest max_files profiles"""
+        try:
+            # File names start with a UTC timestamp, so name order is age order
+            files = sorted(
+                (entry for entry in os.scandir(self.profile_dir) if entry.is_file()),
+                key=lambda entry: entry.name,
+            )
+            for entry in files[:-self.max_files] if self.max_files else []:
+                os.remove(entry.path)
+        except OSError as e:
+            logger.warning(f"Failed to rotate profiles in {self.profile_dir}: {str(e)}")
@@ -0,0 +1,124 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Iterator, Optional
+import logging
+import os
+import re
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Repeated statement detection: warn (default outside production), raise (tests/CI) or off
+SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", "10"))
+SQL_REPEAT_MODE = os.getenv(
+    "SQL_REPEAT_MODE", "off" if os.getenv("ENVIRONMENT") == "production" else "warn"
+)
+
+DB_QUERIES_PER_REQUEST = registry.histogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request", ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+DB_TIME_PER_REQUEST = registry.histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements per HTTP request", ("route",)
+)
+
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:[^()]*)\)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+class RepeatedQueryError(RuntimeError):
+    """Raised in SQL_REPEAT_MODE=raise when one request repeats a statement shape too often"""
+
+@lru_cache(maxsize=1024)
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so that N+1 variants of the same query compare equal"""
+    shape = _IN_LIST_RE.sub("IN (?)", statement)
+    shape = _NUMBER_RE.sub("?", shape)
+    return _WHITESPACE_RE.sub(" ", shape).strip()
+
+class QueryStats:
+    """SQL statements issued while serving one request (or one tracked block)"""
+
+    __slots__ = ("count", "total_time", "shapes", "reported")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.shapes: Dict[str, int] = {}
+        self.reported = False
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        if not SQL_REPEAT_THRESHOLD or SQL_REPEAT_MODE == "off":
+            return
+
+        shape = statement_shape(statement)
+        seen = self.shapes.get(shape, 0) + 1
+        self.shapes[shape] = seen
+        if seen > SQL_REPEAT_THRESHOLD:
+            message = f"Statement repeated {seen} times in one request (possible N+1): {shape[:200]}"
+            if SQL_REPEAT_MODE == "raise":
+                raise RepeatedQueryError(message)
+            if not self.reported:
+                self.reported = True
+                logger.warning(message)
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def begin_tracking() -> QueryStats:
+    """Start counting statements for the current context (request task and its threadpool calls)"""
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+def current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the statements issued inside a block, e.g. ``with track_queries() as stats: ...``"""
+    token = _current_stats.set(QueryStats())
+    try:
+        yield _current_stats.get()
+    finally:
+        _current_stats.reset(token)
+
+def record_request(stats: QueryStats, route: str) -> None:
+    DB_QUERIES_PER_REQUEST.observe(stats.count, route)
+    DB_TIME_PER_REQUEST.observe(stats.total_time, route)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+        stats.record(statement)
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None:
+        start_times = conn.info.get("query_start_time")
+        if start_times:
+            stats.total_time += time.perf_counter() - start_times.pop()
+
+def _handle_error(exception_context):
+    start_times = exception_context.connection.info.get("query_start_time") if exception_context.connection else None
+    if start_times:
+        start_times.pop()
+
+_installed = False
+
+def install_query_hooks() -> None:
+    """Attach statement counters to every Engine (primary, replicas and async engines' sync cores)"""
+    global _installed
+    if _installed:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    _installed = True
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from typing import Generic, Optional, Sequence, TypeVar
+import itertools
+import time
+
+T = TypeVar("T")
+
+class ReadRouter(Generic[T]):
+    """Round-robins reads across replicas, pinning recent writers to the primary.
+
+    A user whose request committed within the last ``window`` seconds reads from
+    the primary (``choose`` returns None) so they always see their own writes
+    despite replication lag. Recent writers are tracked in-process, so with
+    several workers the window is per worker; keep it comfortably above the
+    replicas' typical lag.
+    """
+
+    def __init__(self, replicas: Sequence[T], window: float):
+        self.replicas = list(replicas)
+        self.window = window
+        self._next = itertools.cycle(self.replicas) if self.replicas else None
+        # user_id -> last write time, oldest first, so expiry pops from the front
+        self._recent_writes: "OrderedDict[int, float]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def record_write(self, user_id: int) -> None:
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        self._recent_writes[user_id] = now
+        self._recent_writes.move_to_end(user_id)
+        self._expire(now)
+
+    def choose(self, user_id: Optional[int]) -> Optional[T]:
+        """Replica to read from, or None to use the primary"""
+        if not self.enabled:
+            return None
+        if user_id is not None and user_id in self._recent_writes:
+            now = time.monotonic()
+            self._expire(now)
+            if user_id in self._recent_writes:
+                return None
+        return next(self._next)
+
+    def _expire(self, now: float) -> None:
+        recent = self._recent_writes
+        while recent:
+            user_id, written_at = next(iter(recent.items()))
+            if now - written_at < self.window:
+                break
+            recent.popitem(last=False)
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+import heapq
+import itertools
+import json
+import logging
+import urllib.request
+
+from starlette.concurrency import run_in_threadpool
+
+from core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+REMINDERS_PENDING = registry.gauge("expiration_reminders_pending", "Expiration reminders held by the scheduler")
+REMINDERS_SENT = registry.counter("expiration_reminders_sent_total", "Expiration reminders emitted", ("sink",))
+
+class Reminder(NamedTuple):
+    coupon_id: int
+    user_id: int
+    expiration_date: datetime
+    remind_at: datetime
+
+ReminderSink = Callable[[Reminder], Awaitable[None]]
+
+class ReminderScheduler:
+    """Upcoming expiration reminders in a min-heap ordered by remind_at.
+
+    Only reminders falling before ``loaded_until`` are held, so memory tracks the
+    look-ahead window rather than the coupons table; the window is extended by
+    one indexed range query at a time. Rescheduling or cancelling a coupon just
+    bumps its version, and superseded heap entries are skipped when they surface,
+    so every change is O(log n) without searching the heap.
+    """
+
+    def __init__(self, lead_time: timedelta):
+        self.lead_time = lead_time
+        self.loaded_until: Optional[datetime] = None
+        self._heap: List[Tuple[datetime, int, int]] = []
+        self._current: Dict[int, Tuple[int, Reminder]] = {}
+        self._versions = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def __contains__(self, coupon_id: int) -> bool:
+        return coupon_id in self._current
+
+    def schedule(self, coupon_id: int, user_id: int, expiration_date: datetime) -> bool:
+        """(Re)schedule a coupon's reminder; True if it is now the earliest one"""
+        remind_at = expiration_date - self.lead_time
+        if self.loaded_until is None or remind_at > self.loaded_until:
+            # Beyond the window: the next extension of the window will load it
+            self.cancel(coupon_id)
+            return False
+        version = next(self._versions)
+        self._current[coupon_id] = (version, Reminder(coupon_id, user_id, expiration_date, remind_at))
+        heapq.heappush(self._heap, (remind_at, coupon_id, version))
+        REMINDERS_PENDING.set(len(self._current))
+        return self._heap[0][2] == version
+
+    def cancel(self, coupon_id: int) -> None:
+        if self._current.pop(coupon_id, None) is not None:
+            REMINDERS_PENDING.set(len(self._current))
+
+    def next_due(self) -> Optional[datetime]:
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[Reminder]:
+        """Remove and return every reminder due at or before ``now``"""
+        due = []
+        self._discard_stale()
+        while self._heap and self._heap[0][0] <= now:
+            _, coupon_id, _ = heapq.heappop(self._heap)
+            due.append(self._current.pop(coupon_id)[1])
+            self._discard_stale()
+        REMINDERS_PENDING.set(len(self._current))
+        return due
+
+    def _discard_stale(self) -> None:
+        heap = self._heap
+        while heap:
+            _, coupon_id, version = heap[0]
+            current = self._current.get(coupon_id)
+            if current is not None and current[0] == version:
+                return
+            heapq.heappop(heap)
+
+# Sinks
+
+async def log_sink(reminder: Reminder) -> None:
+    logger.info(f"Coupon {reminder.coupon_id} of user {reminder.user_id} expires at {reminder.expiration_date.isoformat()}")
+    REMINDERS_SENT.inc("log")
+
+def event_sink(broker) -> ReminderSink:
+    """Publish ``coupon.expiring`` on the owner's /coupons/events streams"""
+    async def sink(reminder: Reminder) -> None:
+        await broker.publish(reminder.user_id, "coupon.expiring", {
+            "id": reminder.coupon_id,
+            "expiration_date": reminder.expiration_date.isoformat(),
+        })
+        REMINDERS_SENT.inc("events")
+    return sink
+
+def webhook_sink(url: str, timeout: float = 5.0) -> ReminderSink:
+    """POST each reminder as JSON to ``url``"""
+    def post(body: bytes) -> None:
+        request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=timeout):
+            pass
+
+    async def sink(reminder: Reminder) -> None:
+        body = json.dumps({
+            "event": "coupon.expiring",
+            "coupon_id": reminder.coupon_id,
+            "user_id": reminder.user_id,
+            "expiration_date": reminder.expiration_date.isoformat(),
+        }).encode()
+        try:
+            await run_in_threadpool(post, body)
+            REMINDERS_SENT.inc("webhook")
+        except OSError as e:
+            logger.warning(f"Reminder webhook for coupon {reminder.coupon_id} failed: {e}")
+    return sink
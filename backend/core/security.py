@@ -1,12 +1,16 @@
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError, VerificationError
 from jose import JWTError, jwt
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 import secrets
 import os
+import time
 import argon2
 
+from core.metrics import ARGON2_IN_PROGRESS, ARGON2_LATENCY
+
 # Argon2id configuration for production security
 ph = PasswordHasher(
     time_cost=3,           # Number of iterations
@@ -43,6 +47,16 @@ class SecurityManager:
             return False
         except Exception:
             return False
+
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        """Hash a password on the threadpool so the event loop keeps serving requests."""
+        return await _run_argon2("hash", SecurityManager.hash_password, password)
+
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        """Verify a password on the threadpool so the event loop keeps serving requests."""
+        return await _run_argon2("verify", SecurityManager.verify_password, plain_password, hashed_password)
     
     @staticmethod
     def needs_rehash(hashed_password: str) -> bool:
@@ -92,6 +106,16 @@ class SecurityManager:
         """Generate a cryptographically secure random token."""
         return secrets.token_urlsafe(length)
 
+async def _run_argon2(operation: str, fn, *args):
+    """Run an Argon2 call off the event loop, tracking queue depth and latency (incl. queueing)"""
+    ARGON2_IN_PROGRESS.inc(operation)
+    start_time = time.perf_counter()
+    try:
+        return await run_in_threadpool(fn, *args)
+    finally:
+        ARGON2_IN_PROGRESS.dec(operation)
+        ARGON2_LATENCY.observe(time.perf_counter() - start_time, operation)
+
 # Password validation rules
 class PasswordValidator:
     MIN_LENGTH = 8
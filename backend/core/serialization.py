@@ -0,0 +1,96 @@
+from contextvars import ContextVar
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Mapping, Optional
+
+import msgpack
+import orjson
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+_JSON_MEDIA_RANGES = ("application/json", "application/*", "*/*")
+_EPOCH = datetime(1970, 1, 1)
+
+# Media type picked for the current request by negotiate_format
+_response_media_type: ContextVar[str] = ContextVar("response_media_type", default="application/json")
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    """JSON written the way Pydantic writes it: Decimals as strings, datetimes in ISO 8601 with Z for UTC"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        # Exact, and no larger than the JSON string; any MessagePack reader can decode it
+        return str(value)
+    if isinstance(value, datetime):
+        # Aware datetimes are packed natively; naive ones are UTC throughout this app
+        delta = value - _EPOCH
+        return msgpack.Timestamp(delta.days * 86400 + delta.seconds, delta.microseconds * 1000)
+    raise TypeError(f"Type is not MessagePack serializable: {type(value).__name__}")
+
+def msgpack_dumps(content: Any) -> bytes:
+    """MessagePack with datetimes as the standard timestamp extension (-1) and Decimals as strings"""
+    return msgpack.packb(content, default=_msgpack_default, datetime=True, use_bin_type=True)
+
+def preferred_media_type(accept: Optional[str]) -> str:
+    """application/msgpack if the Accept header ranks it at least as high as JSON, else application/json"""
+    if not accept:
+        return "application/json"
+    msgpack_q = json_q = 0.0
+    for media_range in accept.split(","):
+        media_type, _, params = media_range.partition(";")
+        media_type = media_type.strip().lower()
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type in _MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type in _JSON_MEDIA_RANGES:
+            json_q = max(json_q, q)
+    return MSGPACK_MEDIA_TYPE if msgpack_q > 0 and msgpack_q >= json_q else "application/json"
+
+async def negotiate_format(request: Request) -> None:
+    """Router dependency: render this request's NegotiatedResponse as its Accept header prefers.
+
+    Async so it runs in the request's own context, where the response is built.
+    """
+    _response_media_type.set(preferred_media_type(request.headers.get("accept")))
+
+class FastJSONResponse(JSONResponse):
+    """Encodes with orjson and, being a Response, skips the route's response_model validation.
+
+    Only for content we built ourselves from the database (plain dicts, lists,
+    enums, Decimals, datetimes); the response_model still documents the shape.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class NegotiatedResponse(FastJSONResponse):
+    """FastJSONResponse, or MessagePack when negotiate_format picked it for this request.
+
+    Used as the default response class of routers that depend on negotiate_format,
+    so response_model output is negotiated too (its Decimals and datetimes arrive
+    already as JSON strings); trusted content keeps them native and compact.
+    """
+
+    def __init__(self, content: Any, status_code: int = 200, headers: Optional[Mapping[str, str]] = None, **kwargs):
+        self.media_type = _response_media_type.get()
+        super().__init__(content, status_code, {**(headers or {}), "Vary": "Accept"}, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        if self.media_type == MSGPACK_MEDIA_TYPE:
+            return msgpack_dumps(content)
+        return dumps(content)
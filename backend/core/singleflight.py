@@ -0,0 +1,64 @@
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+import asyncio
+
+from core.metrics import record_cache
+
+T = TypeVar("T")
+
+class SingleFlight(Generic[T]):
+    """Coalesces concurrent identical calls into one in-flight call.
+
+    The first caller for a key runs ``fn``; callers arriving with the same key
+    while it is running wait for and share its result (or exception) instead of
+    running their own. Nothing is kept once the call finishes, so this only
+    removes duplicate work that overlaps in time. Joins and misses are counted
+    as hits and misses of cache ``name`` (see core.metrics.record_cache).
+    Only touched from the event loop, so no locking is needed.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                return await self._lead(key, fn)
+            record_cache(self.name, True)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader's request was cancelled (client went away): run it ourselves
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+
+    async def _lead(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        record_cache(self.name, False)
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Followers re-raise it; don't warn about it going unretrieved when there are none
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def forget(self, match: Callable[[Any], bool]) -> None:
+        """Stop sharing in-flight calls whose key matches, so later callers start a fresh one"""
+        for key in [key for key in self._calls if match(key)]:
+            del self._calls[key]
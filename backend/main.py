@@ -1,41 +1,73 @@
-from fastapi import FastAPI, Request, status
+from fastapi import FastAPI, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
+from sqlalchemy.exc import TimeoutError as SQLAlchemyTimeoutError
 from contextlib import asynccontextmanager
 import logging
 import os
+import secrets
 import time
 
-from models.database import create_tables
-from api import auth, coupons
+from models.database import check_schema_version, engine, async_engine, replica_engines, DB_RETRY_AFTER_SECONDS
+from api import auth, coupons, analytics
+from api.reminders import create_expiration_reminders
+from core.jobs import create_job_worker
 from core.security import RateLimiter
+from core.middleware import RequestMiddleware, DEFAULT_CSP
+from core.profiling import ProfilingMiddleware
+from core.logging_config import configure_logging, dropped_records, shutdown_logging
+from core import metrics
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging (queued, written by a background thread)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+# Metrics; GET /metrics also accepts this static bearer token, for scrapers
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+metrics.register_log_drops(dropped_records)
+metrics.register_engine("primary", engine)
+if async_engine is not None:
+    metrics.register_engine("primary_async", async_engine.sync_engine)
+for index, replica_engine in enumerate(replica_engines):
+    metrics.register_engine(f"replica_{index}", replica_engine)
+
 # Rate limiter
 limiter = Limiter(key_func=get_remote_address)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    configure_logging()
     logger.info("Starting up Family Coupon Manager API")
-    create_tables()
-    logger.info("Database tables created/verified")
+    # Migrations run out of band (`alembic upgrade head`); workers only verify the version
+    check_schema_version()
+    logger.info("Database schema version verified")
+    await coupons.event_broker.start()
+    reminders = create_expiration_reminders(coupons.event_broker)
+    if reminders is not None:
+        await reminders.start()
+    job_worker = create_job_worker()
+    if job_worker is not None:
+        await job_worker.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down Family Coupon Manager API")
+    if job_worker is not None:
+        await job_worker.stop()
+    if reminders is not None:
+        await reminders.stop()
+    await coupons.event_broker.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
+    shutdown_logging()
 
 # Create FastAPI app
 app = FastAPI(
@@ -66,28 +98,18 @@ app.add_middleware(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
-# Security headers middleware
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    start_time = time.time()
-    
-    response = await call_next(request)
-    
-    # Add security headers
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-    
-    if os.getenv("ENVIRONMENT") == "production":
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    
-    # Add processing time
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    
-    return response
+# On-demand request profiling for admins (runs inside RequestMiddleware)
+app.add_middleware(ProfilingMiddleware, authorize=auth.is_admin_token)
+
+# Request tracking, filtering and security headers (pure ASGI, outermost user middleware)
+app.add_middleware(
+    RequestMiddleware,
+    block_suspicious=True,
+    calls_per_minute=int(os.getenv("RATE_LIMIT_PER_MINUTE", "0")) or None,
+    content_security_policy=DEFAULT_CSP if os.getenv("ENVIRONMENT") == "production" else None,
+    hsts=os.getenv("ENVIRONMENT") == "production",
+    expose_query_stats=os.getenv("ENVIRONMENT", "development") != "production"
+)
 
 # Exception handlers
 @app.exception_handler(RequestValidationError)
@@ -100,6 +122,16 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         }
     )
 
+@app.exception_handler(SQLAlchemyTimeoutError)
+async def pool_timeout_handler(request: Request, exc: SQLAlchemyTimeoutError):
+    # Waited DB_POOL_TIMEOUT for a connection: the pool is saturated, tell clients to back off
+    logger.warning(f"Database pool timeout on {request.url.path}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"message": "Service busy, please retry"},
+        headers={"Retry-After": str(DB_RETRY_AFTER_SECONDS)}
+    )
+
 @app.exception_handler(500)
 async def internal_server_error_handler(request: Request, exc):
     logger.error(f"Internal server error: {str(exc)}", exc_info=True)
@@ -117,6 +149,24 @@ async def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(request: Request):
+    """Prometheus text exposition of request, pool, hashing and cache metrics; for METRICS_TOKEN or admins"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    scraper = bool(METRICS_TOKEN) and secrets.compare_digest(token.encode(), METRICS_TOKEN.encode())
+    if not scraper and not await run_in_threadpool(auth.is_admin_token, token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return {
@@ -129,6 +179,8 @@ async def root():
 # Include routers
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(coupons.router, prefix="/api/v1")
+app.include_router(coupons.uses_router, prefix="/api/v1")
+app.include_router(analytics.router, prefix="/api/v1")
 
 if __name__ == "__main__":
     import uvicorn
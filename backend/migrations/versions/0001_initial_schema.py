@@ -0,0 +1,114 @@
+"""initial schema
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-18 21:25:32.201594
+
+The schema previously produced by Base.metadata.create_all. Databases created
+that way should be marked as migrated with `alembic stamp 0001`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('username', sa.String(length=100), nullable=False),
+    sa.Column('full_name', sa.String(length=200), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_admin', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_login', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_index('ix_users_id', 'users', ['id'], unique=False)
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+    op.create_table('coupons',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('code', sa.String(length=100), nullable=False),
+    sa.Column('title', sa.String(length=200), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('discount_type', sa.String(length=20), nullable=False),
+    sa.Column('discount_value', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('minimum_purchase', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('maximum_discount', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('usage_limit', sa.Integer(), nullable=True),
+    sa.Column('usage_count', sa.Integer(), nullable=True),
+    sa.Column('per_user_limit', sa.Integer(), nullable=True),
+    sa.Column('start_date', sa.DateTime(), nullable=True),
+    sa.Column('expiration_date', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('store_name', sa.String(length=200), nullable=True),
+    sa.Column('category', sa.String(length=100), nullable=True),
+    sa.Column('tags', sa.Text(), nullable=True),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_coupon_category_store', 'coupons', ['category', 'store_name'], unique=False)
+    op.create_index('idx_coupon_created_by', 'coupons', ['created_by'], unique=False)
+    op.create_index('idx_coupon_status_expiry', 'coupons', ['status', 'expiration_date'], unique=False)
+    op.create_index('ix_coupons_code', 'coupons', ['code'], unique=False)
+    op.create_index('ix_coupons_id', 'coupons', ['id'], unique=False)
+
+    op.create_table('refresh_tokens',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('token', sa.String(length=255), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('is_revoked', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_refresh_tokens_id', 'refresh_tokens', ['id'], unique=False)
+    op.create_index('ix_refresh_tokens_token', 'refresh_tokens', ['token'], unique=True)
+
+    op.create_table('coupon_uses',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('coupon_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('used_at', sa.DateTime(), nullable=True),
+    sa.Column('amount_saved', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('purchase_amount', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['coupon_id'], ['coupons.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_coupon_use_date', 'coupon_uses', ['used_at'], unique=False)
+    op.create_index('idx_coupon_use_user_coupon', 'coupon_uses', ['user_id', 'coupon_id'], unique=False)
+    op.create_index('ix_coupon_uses_id', 'coupon_uses', ['id'], unique=False)
+
+def downgrade() -> None:
+    op.drop_index('ix_coupon_uses_id', table_name='coupon_uses')
+    op.drop_index('idx_coupon_use_user_coupon', table_name='coupon_uses')
+    op.drop_index('idx_coupon_use_date', table_name='coupon_uses')
+    op.drop_table('coupon_uses')
+
+    op.drop_index('ix_refresh_tokens_token', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_id', table_name='refresh_tokens')
+    op.drop_table('refresh_tokens')
+
+    op.drop_index('ix_coupons_id', table_name='coupons')
+    op.drop_index('ix_coupons_code', table_name='coupons')
+    op.drop_index('idx_coupon_status_expiry', table_name='coupons')
+    op.drop_index('idx_coupon_created_by', table_name='coupons')
+    op.drop_index('idx_coupon_category_store', table_name='coupons')
+    op.drop_table('coupons')
+
+    op.drop_index('ix_users_username', table_name='users')
+    op.drop_index('ix_users_id', table_name='users')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_table('users')
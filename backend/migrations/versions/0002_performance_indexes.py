@@ -0,0 +1,40 @@
+"""performance indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 21:40:00.000000
+
+Indexes for the per-coupon usage lookups, each user's coupon list ordered by
+updated_at and refresh tokens by user. Built with CREATE INDEX CONCURRENTLY on
+PostgreSQL so writes to live tables are not blocked while they build.
+"""
+from alembic import op
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('idx_coupon_use_coupon', 'coupon_uses', ['coupon_id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('idx_coupon_created_by_updated', 'coupons', ['created_by', 'updated_at'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('idx_refresh_token_user', 'refresh_tokens', ['user_id'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        # (created_by, updated_at) serves every created_by lookup
+        op.drop_index('idx_coupon_created_by', table_name='coupons',
+                      postgresql_concurrently=True, if_exists=True)
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('idx_coupon_created_by', 'coupons', ['created_by'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index('idx_refresh_token_user', table_name='refresh_tokens',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('idx_coupon_created_by_updated', table_name='coupons',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('idx_coupon_use_coupon', table_name='coupon_uses',
+                      postgresql_concurrently=True, if_exists=True)
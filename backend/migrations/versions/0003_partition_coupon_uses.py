@@ -0,0 +1,110 @@
+"""partition coupon_uses by month
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 22:10:00.000000
+
+PostgreSQL only: rebuilds coupon_uses as a table range-partitioned on used_at,
+one partition per month plus a DEFAULT partition, so queries bounded by used_at
+only touch the months they need and old months can be detached and archived
+(see utils/coupon_use_partitions.py). The primary key becomes (id, used_at) as
+partitioned tables require; id keeps its sequence. Existing rows are copied in
+one transaction, which locks coupon_uses for the duration of the copy.
+
+Other databases keep the plain table.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+from datetime import date
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+PARTITIONS_AHEAD = 3
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE coupon_uses RENAME TO coupon_uses_unpartitioned")
+    op.execute("ALTER INDEX IF EXISTS coupon_uses_pkey RENAME TO coupon_uses_unpartitioned_pkey")
+    for index in ("ix_coupon_uses_id", "idx_coupon_use_date", "idx_coupon_use_user_coupon", "idx_coupon_use_coupon"):
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+
+    op.execute("""
+        CREATE TABLE coupon_uses (
+            id INTEGER NOT NULL DEFAULT nextval('coupon_uses_id_seq'),
+            coupon_id INTEGER NOT NULL REFERENCES coupons (id),
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            used_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            amount_saved NUMERIC(10, 2),
+            purchase_amount NUMERIC(10, 2),
+            notes TEXT,
+            PRIMARY KEY (id, used_at)
+        ) PARTITION BY RANGE (used_at)
+    """)
+    op.execute("ALTER SEQUENCE coupon_uses_id_seq OWNED BY coupon_uses.id")
+
+    first_month = date.today().replace(day=1)
+    if not context.is_offline_mode():
+        oldest = op.get_bind().execute(sa.text("SELECT min(used_at) FROM coupon_uses_unpartitioned")).scalar()
+        if oldest is not None:
+            first_month = min(first_month, oldest.date().replace(day=1))
+
+    month = first_month
+    last_month = _add_months(date.today().replace(day=1), PARTITIONS_AHEAD)
+    while month <= last_month:
+        next_month = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE coupon_uses_p{month:%Y_%m} PARTITION OF coupon_uses "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+        )
+        month = next_month
+    op.execute("CREATE TABLE coupon_uses_default PARTITION OF coupon_uses DEFAULT")
+
+    # Indexes on the parent are created on every partition
+    op.create_index('ix_coupon_uses_id', 'coupon_uses', ['id'], unique=False)
+    op.create_index('idx_coupon_use_date', 'coupon_uses', ['used_at'], unique=False)
+    op.create_index('idx_coupon_use_user_coupon', 'coupon_uses', ['user_id', 'coupon_id'], unique=False)
+    op.create_index('idx_coupon_use_coupon', 'coupon_uses', ['coupon_id'], unique=False)
+
+    op.execute("""
+        INSERT INTO coupon_uses (id, coupon_id, user_id, used_at, amount_saved, purchase_amount, notes)
+        SELECT id, coupon_id, user_id, COALESCE(used_at, now()), amount_saved, purchase_amount, notes
+        FROM coupon_uses_unpartitioned
+    """)
+    op.execute("DROP TABLE coupon_uses_unpartitioned")
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE coupon_uses RENAME TO coupon_uses_partitioned")
+    for index in ("ix_coupon_uses_id", "idx_coupon_use_date", "idx_coupon_use_user_coupon", "idx_coupon_use_coupon"):
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+
+    op.execute("""
+        CREATE TABLE coupon_uses (
+            id INTEGER NOT NULL DEFAULT nextval('coupon_uses_id_seq') PRIMARY KEY,
+            coupon_id INTEGER NOT NULL REFERENCES coupons (id),
+            user_id INTEGER NOT NULL REFERENCES users (id),
+            used_at TIMESTAMP WITHOUT TIME ZONE,
+            amount_saved NUMERIC(10, 2),
+            purchase_amount NUMERIC(10, 2),
+            notes TEXT
+        )
+    """)
+    op.execute("ALTER SEQUENCE coupon_uses_id_seq OWNED BY coupon_uses.id")
+    op.execute("INSERT INTO coupon_uses SELECT id, coupon_id, user_id, used_at, amount_saved, purchase_amount, notes FROM coupon_uses_partitioned")
+    op.execute("DROP TABLE coupon_uses_partitioned CASCADE")
+
+    op.create_index('ix_coupon_uses_id', 'coupon_uses', ['id'], unique=False)
+    op.create_index('idx_coupon_use_date', 'coupon_uses', ['used_at'], unique=False)
+    op.create_index('idx_coupon_use_user_coupon', 'coupon_uses', ['user_id', 'coupon_id'], unique=False)
+    op.create_index('idx_coupon_use_coupon', 'coupon_uses', ['coupon_id'], unique=False)
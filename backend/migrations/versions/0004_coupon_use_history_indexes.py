@@ -0,0 +1,67 @@
+"""coupon use history indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 22:40:00.000000
+
+(coupon_id, used_at, id) and (user_id, used_at, id) serve the keyset-paginated
+redemption history of a coupon and the per-user /uses feed straight from the
+index, newest first. The first replaces idx_coupon_use_coupon.
+
+PostgreSQL cannot build an index CONCURRENTLY on a partitioned table, so there
+the parent index is created ON ONLY coupon_uses and each partition's index is
+built concurrently and attached.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'idx_coupon_use_coupon_date': ['coupon_id', 'used_at', 'id'],
+    'idx_coupon_use_user_date': ['user_id', 'used_at', 'id'],
+}
+
+def _partitions() -> list:
+    """Partitions of coupon_uses, or [] when it is a plain table (or SQL is only being generated)"""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or context.is_offline_mode():
+        return []
+    return bind.execute(sa.text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'coupon_uses' ORDER BY c.relname"
+    )).scalars().all()
+
+def upgrade() -> None:
+    partitions = _partitions()
+
+    if not partitions:
+        with op.get_context().autocommit_block():
+            for name, columns in INDEXES.items():
+                op.create_index(name, 'coupon_uses', columns, unique=False,
+                                postgresql_concurrently=True, if_not_exists=True)
+            op.drop_index('idx_coupon_use_coupon', table_name='coupon_uses',
+                          postgresql_concurrently=True, if_exists=True)
+        return
+
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY coupon_uses ({', '.join(columns)})")
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES.items():
+            for partition in partitions:
+                partition_index = f"{partition}_{name}"
+                op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} ({', '.join(columns)})")
+                op.execute(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}")
+    op.drop_index('idx_coupon_use_coupon', table_name='coupon_uses', if_exists=True)
+
+def downgrade() -> None:
+    concurrently = not _partitions()
+    with op.get_context().autocommit_block():
+        op.create_index('idx_coupon_use_coupon', 'coupon_uses', ['coupon_id'], unique=False,
+                        postgresql_concurrently=concurrently, if_not_exists=True)
+        for name in INDEXES:
+            op.drop_index(name, table_name='coupon_uses', postgresql_concurrently=concurrently, if_exists=True)
@@ -0,0 +1,35 @@
+"""savings rollup
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 21:35:06.470780
+
+Daily per-user savings by store and category for /analytics/savings. New
+redemptions update it as they happen; fill in existing history with
+`python utils/backfill_savings.py`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table('savings_daily',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('store_name', sa.String(length=200), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=False),
+    sa.Column('uses', sa.Integer(), nullable=False),
+    sa.Column('amount_saved', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('purchase_amount', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'day', 'store_name', 'category', name='uq_savings_daily_bucket')
+    )
+
+def downgrade() -> None:
+    op.drop_table('savings_daily')
@@ -0,0 +1,56 @@
+"""coupon change sequence and tombstones
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 23:10:00.000000
+
+coupons.change_seq is bumped on every insert and update and coupon_tombstones
+records deletions, both from the coupon_change_seq sequence on PostgreSQL, so
+/coupons/sync can return a user's changes after a token from the
+(created_by, change_seq) indexes. Existing coupons are numbered once; clients
+start with a full sync anyway.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    is_postgresql = op.get_bind().dialect.name == "postgresql"
+    if is_postgresql:
+        op.execute("CREATE SEQUENCE IF NOT EXISTS coupon_change_seq")
+
+    op.add_column('coupons', sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+    if is_postgresql:
+        op.execute("UPDATE coupons SET change_seq = nextval('coupon_change_seq')")
+    else:
+        op.execute("UPDATE coupons SET change_seq = id")
+
+    op.create_table('coupon_tombstones',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('coupon_id', sa.Integer(), nullable=False),
+    sa.Column('created_by', sa.Integer(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_coupon_tombstone_created_by_change', 'coupon_tombstones', ['created_by', 'change_seq'], unique=False)
+
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.create_index('idx_coupon_created_by_change', 'coupons', ['created_by', 'change_seq'], unique=False,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('idx_coupon_created_by_change', table_name='coupons',
+                      postgresql_concurrently=True, if_exists=True)
+    op.drop_index('idx_coupon_tombstone_created_by_change', table_name='coupon_tombstones')
+    op.drop_table('coupon_tombstones')
+    op.drop_column('coupons', 'change_seq')
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP SEQUENCE IF EXISTS coupon_change_seq")
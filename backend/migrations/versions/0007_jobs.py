@@ -0,0 +1,43 @@
+"""background jobs
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 23:40:00.000000
+
+Queue table for core.jobs. Workers claim due jobs through idx_job_status_run_at
+with FOR UPDATE SKIP LOCKED; the partial unique index keeps at most one queued
+job per key.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=100), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=True),
+    sa.Column('key', sa.String(length=200), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_at', sa.DateTime(), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('locked_by', sa.String(length=100), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_job_status_run_at', 'jobs', ['status', 'run_at'], unique=False)
+    op.create_index('uq_job_queued_key', 'jobs', ['key'], unique=True,
+                    postgresql_where=sa.text("status = 'queued'"), sqlite_where=sa.text("status = 'queued'"))
+
+def downgrade() -> None:
+    op.drop_index('uq_job_queued_key', table_name='jobs')
+    op.drop_index('idx_job_status_run_at', table_name='jobs')
+    op.drop_table('jobs')
@@ -0,0 +1,46 @@
+"""unique coupon code per owner
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 00:10:00.000000
+
+Backs POST /coupons' INSERT ... ON CONFLICT (created_by, code). The service
+already refused duplicate codes with a SELECT first, but that check could race;
+any duplicates it let through must be renamed or removed before upgrading.
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    if not context.is_offline_mode():
+        bind = op.get_bind()
+        duplicates = bind.execute(sa.text(
+            "SELECT created_by, code FROM coupons GROUP BY created_by, code HAVING count(*) > 1"
+        )).fetchall()
+        if duplicates:
+            listed = ", ".join(f"user {created_by} code {code!r}" for created_by, code in duplicates[:20])
+            raise RuntimeError(f"{len(duplicates)} duplicate coupon codes must be resolved first: {listed}")
+        # A concurrent build that failed (a duplicate written meanwhile) leaves an invalid index behind
+        invalid = bind.dialect.name == "postgresql" and bind.execute(sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = 'uq_coupon_created_by_code' AND NOT i.indisvalid"
+        )).scalar()
+    else:
+        invalid = False
+
+    # CONCURRENTLY cannot run inside a transaction block, and does not hold writes to coupons for the build
+    with op.get_context().autocommit_block():
+        if invalid:
+            op.drop_index('uq_coupon_created_by_code', table_name='coupons', postgresql_concurrently=True)
+        op.create_index('uq_coupon_created_by_code', 'coupons', ['created_by', 'code'], unique=True,
+                        postgresql_concurrently=True, if_not_exists=True)
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_coupon_created_by_code', table_name='coupons',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+
+class SavingsBucket(str, Enum):
+    DAY = "day"
+    WEEK = "week"    # ISO weeks, labelled by their Monday
+    MONTH = "month"  # labelled by the 1st
+
+class SavingsGroupBy(str, Enum):
+    NONE = "none"
+    STORE = "store"
+    CATEGORY = "category"
+
+class SavingsPoint(BaseModel):
+    period: date
+    key: Optional[str] = None  # store or category name; None when not grouped or unknown
+    uses: int
+    amount_saved: Decimal
+    purchase_amount: Decimal
+
+class SavingsResponse(BaseModel):
+    bucket: SavingsBucket
+    group_by: SavingsGroupBy
+    total_uses: int
+    total_saved: Decimal
+    series: List[SavingsPoint]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, condecimal, validator
 from typing import Optional, List
 from datetime import datetime
 from decimal import Decimal
@@ -94,6 +94,46 @@ class CouponResponse(CouponBase):
     class Config:
         from_attributes = True
 
+class ConflictMode(str, Enum):
+    ERROR = "error"  # refuse a code the user already has
+    SKIP = "skip"  # keep the existing coupon and return it
+    UPDATE = "update"  # overwrite the existing coupon with the new data
+
+class CouponView(str, Enum):
+    FULL = "full"
+    COMPACT = "compact"
+
+# What a coupon card shows; GET /coupons?view=compact returns only these
+COMPACT_COUPON_FIELDS = (
+    "id", "code", "title", "store_name", "discount_type", "discount_value",
+    "expiration_date", "status", "can_use",
+)
+
+class PartialCouponResponse(BaseModel):
+    """A coupon with only the fields asked for through ``fields=`` or ``view=``"""
+    id: int
+    code: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    discount_type: Optional[DiscountType] = None
+    discount_value: Optional[Decimal] = None
+    minimum_purchase: Optional[Decimal] = None
+    maximum_discount: Optional[Decimal] = None
+    usage_limit: Optional[int] = None
+    per_user_limit: Optional[int] = None
+    start_date: Optional[datetime] = None
+    expiration_date: Optional[datetime] = None
+    store_name: Optional[str] = None
+    category: Optional[str] = None
+    tags: Optional[List[str]] = None
+    usage_count: Optional[int] = None
+    status: Optional[CouponStatus] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    created_by: Optional[int] = None
+    can_use: Optional[bool] = None
+    remaining_uses: Optional[int] = None
+
 class CouponUseBase(BaseModel):
     purchase_amount: Optional[Decimal] = Field(None, gt=0, decimal_places=2)
     notes: Optional[str] = Field(None, max_length=500)
@@ -130,4 +170,69 @@ class PaginatedCouponsResponse(BaseModel):
     total: int
     page: int
     per_page: int
-    total_pages: int
\ No newline at end of file
+    total_pages: int
+
+class PaginatedPartialCouponsResponse(BaseModel):
+    coupons: List[PartialCouponResponse]
+    total: int
+    page: int
+    per_page: int
+    total_pages: int
+
+class PaginatedCouponUsesResponse(BaseModel):
+    uses: List[CouponUseResponse]
+    limit: int
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next (older) page
+
+class BestCouponRequest(BaseModel):
+    purchase_amount: Decimal = Field(..., gt=0, max_digits=10, decimal_places=2)
+    store_name: Optional[str] = Field(None, max_length=200)
+    category: Optional[str] = Field(None, max_length=100)
+    limit: int = Field(10, ge=1, le=100)
+
+class RankedCoupon(BaseModel):
+    id: int
+    code: str
+    title: str
+    discount_type: DiscountType
+    discount_value: Decimal
+    store_name: Optional[str]
+    category: Optional[str]
+    amount_saved: Decimal
+    final_amount: Decimal
+
+class BestCouponResponse(BaseModel):
+    purchase_amount: Decimal
+    evaluated: int  # eligible coupons considered
+    coupons: List[RankedCoupon]
+
+class QuoteRequest(BaseModel):
+    purchase_amounts: List[condecimal(gt=0, max_digits=10, decimal_places=2)] = Field(..., min_length=1, max_length=1000)
+
+class MultiQuoteRequest(QuoteRequest):
+    coupon_ids: List[int] = Field(..., min_length=1, max_length=100)
+
+class CouponQuote(BaseModel):
+    coupon_id: int
+    amounts_saved: List[Optional[Decimal]]  # per purchase amount; null where the minimum purchase is not met
+
+class QuoteResponse(BaseModel):
+    purchase_amounts: List[Decimal]
+    quotes: List[CouponQuote]
+
+class CouponBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+class CouponBatchItem(BaseModel):
+    id: int
+    found: bool
+    coupon: Optional[CouponResponse] = None  # null if there is no such coupon of yours
+
+class CouponBatchResponse(BaseModel):
+    coupons: List[CouponBatchItem]  # one per requested id, in request order
+
+class CouponSyncResponse(BaseModel):
+    coupons: List[CouponResponse]  # created or changed since the token
+    deleted: List[int]  # ids of coupons deleted since the token
+    next_token: int  # pass back as ?since= for the next sync
+    has_more: bool
@@ -0,0 +1,58 @@
+"""
+Shared fixtures: the app against a scratch SQLite database migrated to head, and two seeded users
+Settings are read from the environment at import time, so they are set before the app is imported.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp(prefix="coupon-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ["ENVIRONMENT"] = "test"  # anything but production exposes X-DB-Query-Count
+os.environ["JOBS_ENABLED"] = "false"
+os.environ["REMINDERS_ENABLED"] = "false"
+os.environ["SQL_REPEAT_MODE"] = "raise"
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+# Add the backend directory to the path to import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope="session")
+def app():
+    from alembic import command
+    from alembic.config import Config
+    from models.database import ALEMBIC_INI, User, engine
+
+    command.upgrade(Config(ALEMBIC_INI), "head")
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), [
+            {"id": 1, "email": "tests@family.com", "username": "tests", "full_name": "Tests", "password_hash": "x", "is_active": True},
+            {"id": 2, "email": "family@family.com", "username": "family", "full_name": "Family", "password_hash": "x", "is_active": True},
+        ])
+
+    import main
+    return main.app
+
+@pytest.fixture(scope="session")
+def client(app):
+    from fastapi.testclient import TestClient
+
+    with TestClient(app) as client:
+        yield client
+
+def _auth_headers(user_id: int) -> dict:
+    from core.security import SecurityManager
+
+    return {"Authorization": f"Bearer {SecurityManager.create_access_token({'sub': str(user_id)})}"}
+
+@pytest.fixture(scope="session")
+def auth_headers(app):
+    return _auth_headers(1)
+
+@pytest.fixture(scope="session")
+def family_auth_headers(app):
+    """A second family member, who can redeem the first user's coupons"""
+    return _auth_headers(2)
@@ -0,0 +1,43 @@
+"""The vectorized savings in core.discounts against the scalar calculate_savings"""
+
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+from core.discounts import CouponColumns, calculate_savings, quote_savings, rank_by_savings
+from schemas.coupon import BestCouponRequest, QuoteRequest
+
+# Largest purchase a Numeric(10, 2) column (and so the request schemas) can hold
+MAX_AMOUNT = Decimal("99999999.99")
+
+COUPONS = [
+    (1, "percent", Decimal("100"), None, None),
+    (2, "percent", Decimal("12.5"), Decimal("20"), Decimal("50")),
+    (3, "amount", Decimal("15"), None, None),
+    (4, "percent", Decimal("99.99"), MAX_AMOUNT, None),
+]
+
+@pytest.mark.parametrize("amount", [Decimal("0.01"), Decimal("19.99"), Decimal("33.33"), MAX_AMOUNT])
+def test_quote_matches_calculate_savings(amount):
+    quoted = quote_savings(CouponColumns.from_rows(COUPONS), [amount])
+    expected = [[calculate_savings(kind, value, amount, minimum, cap)] for _, kind, value, minimum, cap in COUPONS]
+    assert quoted == expected
+
+def test_quote_request_accepts_largest_amount():
+    assert QuoteRequest(purchase_amounts=[MAX_AMOUNT]).purchase_amounts == [MAX_AMOUNT]
+
+@pytest.mark.parametrize("amount", ["100000000.00", "10000000000000.00", "1E+17"])
+def test_quote_request_rejects_amounts_beyond_numeric_10_2(amount):
+    with pytest.raises(ValidationError):
+        QuoteRequest(purchase_amounts=[Decimal(amount)])
+
+def test_rank_matches_calculate_savings_at_largest_amount():
+    ranked = dict(rank_by_savings(CouponColumns.from_rows(COUPONS), MAX_AMOUNT))
+    for coupon_id, kind, value, minimum, cap in COUPONS:
+        assert ranked.get(coupon_id) == calculate_savings(kind, value, MAX_AMOUNT, minimum, cap)
+
+@pytest.mark.parametrize("amount", ["100000000.00", "1E+17"])
+def test_best_coupon_request_rejects_amounts_beyond_numeric_10_2(amount):
+    with pytest.raises(ValidationError):
+        BestCouponRequest(purchase_amount=Decimal(amount))
@@ -0,0 +1,40 @@
+"""Write routes must not run SQL on the event loop thread (e.g. reloading an expired current_user)"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from models.database import engine
+
+COUPON = {"code": "LOOP1", "title": "Event loop", "discount_type": "amount", "discount_value": "5"}
+
+@pytest.fixture
+def loop_statements():
+    """Statements executed while an event loop is running on the executing thread"""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", on_execute)
+
+def test_write_routes_keep_sql_off_the_event_loop(client, auth_headers, loop_statements):
+    response = client.post("/api/v1/coupons/", json=COUPON, headers=auth_headers)
+    assert response.status_code == 201, response.text
+    coupon_id = response.json()["id"]
+
+    response = client.put(f"/api/v1/coupons/{coupon_id}", json={"title": "Renamed"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    response = client.post(f"/api/v1/coupons/{coupon_id}/use", json={"coupon_id": coupon_id}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    response = client.delete(f"/api/v1/coupons/{coupon_id}", headers=auth_headers)
+    assert response.status_code == 200, response.text
+
+    assert loop_statements == []
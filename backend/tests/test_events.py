@@ -0,0 +1,19 @@
+"""Which users' streams coupon events are published to"""
+
+from api.coupons import event_broker
+
+COUPON = {"code": "EVENTS1", "title": "Events", "discount_type": "amount", "discount_value": "5"}
+
+def test_use_by_family_member_reaches_owner_and_redeemer(client, auth_headers, family_auth_headers, monkeypatch):
+    response = client.post("/api/v1/coupons/", json=COUPON, headers=auth_headers)
+    assert response.status_code == 201, response.text
+    coupon = response.json()
+
+    delivered = []
+    monkeypatch.setattr(event_broker, "deliver", lambda user_id, event, data: delivered.append((user_id, event)))
+    response = client.post(
+        f"/api/v1/coupons/{coupon['id']}/use", json={"coupon_id": coupon["id"]}, headers=family_auth_headers
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["user_id"] == 2
+    assert sorted(delivered) == [(1, "coupon.used"), (2, "coupon.used")]
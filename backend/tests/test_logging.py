@@ -0,0 +1,26 @@
+"""Access logs must not carry credentials passed in the query string"""
+
+import logging
+
+from core.logging_config import RedactAccessLogFilter, redact_query
+
+def test_redact_query():
+    assert redact_query("access_token=abc.def.ghi&since=3") == "access_token=[REDACTED]&since=3"
+    assert redact_query("page=2&refresh_token=abc&API_KEY=xyz") == "page=2&refresh_token=[REDACTED]&API_KEY=[REDACTED]"
+    assert redact_query("/api/v1/auth/tokens?page=2&q=tokenize") == "/api/v1/auth/tokens?page=2&q=tokenize"
+
+def test_uvicorn_access_line_redacted():
+    record = logging.LogRecord(
+        "uvicorn.access", logging.INFO, __file__, 0, '%s - "%s %s HTTP/%s" %d',
+        ("127.0.0.1:5000", "GET", "/api/v1/coupons/events?access_token=abc.def.ghi", "1.1", 200), None
+    )
+    assert RedactAccessLogFilter().filter(record)
+    assert "abc.def.ghi" not in record.getMessage()
+    assert "access_token=[REDACTED]" in record.getMessage()
+
+def test_request_log_redacts_access_token(client, caplog):
+    with caplog.at_level(logging.INFO, logger="core.middleware"):
+        client.get("/api/v1/coupons/events?access_token=abc.def.ghi&probe=1")
+    queries = [record.fields["query"] for record in caplog.records if getattr(record, "fields", None)]
+    assert queries
+    assert all("abc.def.ghi" not in query for query in queries)
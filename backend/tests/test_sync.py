@@ -0,0 +1,44 @@
+"""/coupons/sync paging over coupons changed together in one flush"""
+
+from datetime import timedelta
+
+from api.coupons import CouponService
+from models.database import Coupon, SessionLocal, utcnow
+from schemas.coupon import CouponStatus
+
+SYNC_URL = "/api/v1/coupons/sync"
+
+def sync_all(client, headers, since: int, limit: int) -> tuple[set, int]:
+    """Page through /coupons/sync from ``since``; (coupon ids seen, last next_token)"""
+    seen = set()
+    while True:
+        response = client.get(SYNC_URL, params={"since": since, "limit": limit}, headers=headers)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        seen.update(coupon["id"] for coupon in body["coupons"])
+        since = body["next_token"]
+        if not body["has_more"]:
+            return seen, since
+
+def test_sync_pages_through_one_flush_of_changes(client, family_auth_headers):
+    with SessionLocal() as session:
+        coupons = [
+            Coupon(
+                code=f"SYNC{i}", title=f"Sync {i}", discount_type="amount", discount_value=5,
+                expiration_date=utcnow() - timedelta(days=1), status=CouponStatus.ACTIVE, created_by=2
+            )
+            for i in range(5)
+        ]
+        session.add_all(coupons)
+        session.commit()
+        ids = {coupon.id for coupon in coupons}
+
+    _, token = sync_all(client, family_auth_headers, 0, 1000)
+
+    # The expiry job changes all of them in a single flush
+    with SessionLocal() as session:
+        assert CouponService(session).expire_coupons(100) >= len(ids)
+        session.commit()
+
+    seen, _ = sync_all(client, family_auth_headers, token, 2)
+    assert ids <= seen
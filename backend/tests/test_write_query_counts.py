@@ -0,0 +1,80 @@
+"""
+Per-route SQL statement budgets for the coupon write paths
+Counts come from the X-DB-Query-Count header, i.e. the core.query_stats tracking of the request,
+and include the users lookup done by authentication.
+"""
+
+import pytest
+
+from core.query_stats import track_queries
+
+COUPON = {
+    "code": "WRITE1", "title": "Write path", "discount_type": "percent", "discount_value": "10",
+    "minimum_purchase": "20", "usage_limit": 5, "per_user_limit": 2, "tags": ["grocery"],
+}
+
+def query_count(response) -> int:
+    return int(response.headers["x-db-query-count"])
+
+@pytest.fixture(scope="module")
+def coupon(client, auth_headers):
+    response = client.post("/api/v1/coupons/", json=COUPON, headers=auth_headers)
+    assert response.status_code == 201, response.text
+    # INSERT ... RETURNING
+    assert query_count(response) <= 2
+    return response.json()
+
+def test_create(coupon):
+    assert coupon["code"] == COUPON["code"]
+
+def test_create_update_existing_code(client, auth_headers, coupon):
+    from models.database import engine
+
+    response = client.post(
+        "/api/v1/coupons/?on_conflict=update", json={**COUPON, "title": "Updated"}, headers=auth_headers
+    )
+    # An existing code is always an update, even within the second the coupon was created
+    assert response.status_code == 200, response.text
+    assert response.json()["id"] == coupon["id"]
+    assert response.json()["title"] == "Updated"
+    # INSERT ... ON CONFLICT DO UPDATE on PostgreSQL; INSERT ... DO NOTHING then UPDATE elsewhere
+    assert query_count(response) <= (2 if engine.dialect.name == "postgresql" else 3)
+
+def test_create_skip_existing_code(client, auth_headers, coupon):
+    response = client.post("/api/v1/coupons/?on_conflict=skip", json=COUPON, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["id"] == coupon["id"]
+    # INSERT ... ON CONFLICT DO NOTHING, then SELECT the existing coupon
+    assert query_count(response) <= 3
+
+def test_create_duplicate_code_rejected(client, auth_headers, coupon):
+    response = client.post("/api/v1/coupons/", json=COUPON, headers=auth_headers)
+    assert response.status_code == 400
+
+def test_update(client, auth_headers, coupon):
+    response = client.put(
+        f"/api/v1/coupons/{coupon['id']}", json={"title": "Renamed", "tags": []}, headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["title"] == "Renamed"
+    # UPDATE ... RETURNING
+    assert query_count(response) <= 2
+
+def test_use(client, auth_headers, coupon):
+    response = client.post(
+        f"/api/v1/coupons/{coupon['id']}/use",
+        json={"coupon_id": coupon["id"], "purchase_amount": "42.00"}, headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    # UPDATE ... RETURNING, INSERT coupon_uses, savings_daily upsert
+    assert query_count(response) <= 4
+
+def test_track_queries_counts_block(app):
+    from sqlalchemy import text
+    from models.database import engine
+
+    with track_queries() as stats:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    assert stats.count == 2
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Savings rollup backfill for the Family Coupon Manager
+Rebuilds savings_daily from coupon_uses joined to coupons, for everyone or one
+user and optionally a date range. Safe to re-run: the range is replaced in one
+transaction. Run it once after migrating, or to repair the rollup. Months whose
+coupon_uses partitions were archived are never cleared: the rollup is all that
+is left of them.
+
+Usage: python utils/backfill_savings.py [--user-id ID] [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+"""
+
+import sys
+import os
+import argparse
+from datetime import date
+
+# Add the parent directory to the path to import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import SessionLocal
+from api.analytics import oldest_retained_day, rebuild_savings
+
+def backfill(user_id: int = None, since: date = None, until: date = None) -> int:
+    db = SessionLocal()
+    try:
+        retained = oldest_retained_day(db)
+        if retained is not None and (since is None or since < retained):
+            print(f"Keeping savings_daily before {retained}: older coupon_uses partitions were archived")
+        rows = rebuild_savings(db, user_id, since, until)
+        db.commit()
+        return rows
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the savings_daily rollup from coupon_uses")
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--since", type=date.fromisoformat, help="First day included (UTC)")
+    parser.add_argument("--until", type=date.fromisoformat, help="First day excluded (UTC)")
+    args = parser.parse_args()
+
+    rows = backfill(args.user_id, args.since, args.until)
+    print(f"✅ Rebuilt savings_daily: {rows} rows")
+
+if __name__ == "__main__":
+    main()
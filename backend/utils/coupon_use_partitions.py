@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Partition maintenance for coupon_uses (PostgreSQL)
+Creates upcoming monthly partitions and archives months older than the retention
+period to gzip-compressed CSV before dropping them, keeping the hot table small.
+
+Usage: python utils/coupon_use_partitions.py [maintain|archive|all] [--dry-run]
+Run daily from cron; every step is idempotent. Archived redemptions no longer
+appear in /coupons/{id}/uses or count towards per-user limits.
+"""
+
+import sys
+import os
+import argparse
+import csv
+import gzip
+import logging
+import re
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+# Add the parent directory to the path to import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import engine
+
+logger = logging.getLogger("coupon_use_partitions")
+
+PARTITIONS_AHEAD = int(os.getenv("COUPON_USES_PARTITIONS_AHEAD", "3"))
+RETENTION_MONTHS = int(os.getenv("COUPON_USES_RETENTION_MONTHS", "24"))
+ARCHIVE_DIR = os.getenv("COUPON_USES_ARCHIVE_DIR", "archive/coupon_uses")
+
+COLUMNS = ("id", "coupon_id", "user_id", "used_at", "amount_saved", "purchase_amount", "notes")
+_PARTITION_RE = re.compile(r"^coupon_uses_p(\d{4})_(\d{2})$")
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"coupon_uses_p{month:%Y_%m}"
+
+def is_partitioned(conn) -> bool:
+    return bool(conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = 'coupon_uses'"
+    )).scalar())
+
+def list_partitions(conn) -> dict:
+    """Monthly partitions attached to coupon_uses, keyed by their first day"""
+    rows = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'coupon_uses'"
+    )).scalars()
+    partitions = {}
+    for name in rows:
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return partitions
+
+def create_partition(conn, month: date) -> None:
+    """Attach a partition for ``month``, moving any of its rows out of the DEFAULT partition"""
+    name = partition_name(month)
+    start, end = month.isoformat(), add_months(month, 1).isoformat()
+    # Rows for this month may already sit in the default partition; ATTACH would fail on them
+    conn.execute(text(f"CREATE TABLE {name} (LIKE coupon_uses INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM coupon_uses_default WHERE used_at >= :start AND used_at < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), {"start": start, "end": end})
+    conn.execute(text(f"ALTER TABLE coupon_uses ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"))
+
+def maintain(dry_run: bool = False) -> None:
+    """Make sure partitions exist for this month and the next PARTITIONS_AHEAD months"""
+    this_month = date.today().replace(day=1)
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            logger.info("coupon_uses is not partitioned on this database; nothing to do")
+            return
+        existing = list_partitions(conn)
+        for offset in range(PARTITIONS_AHEAD + 1):
+            month = add_months(this_month, offset)
+            if month in existing:
+                continue
+            logger.info(f"Creating partition {partition_name(month)}")
+            if not dry_run:
+                create_partition(conn, month)
+
+def archive(dry_run: bool = False) -> None:
+    """Export and drop monthly partitions older than RETENTION_MONTHS"""
+    cutoff = add_months(date.today().replace(day=1), -RETENTION_MONTHS)
+    with engine.connect() as conn:
+        if not is_partitioned(conn):
+            logger.info("coupon_uses is not partitioned on this database; nothing to do")
+            return
+        expired = sorted(month for month in list_partitions(conn) if month < cutoff)
+
+    os.makedirs(ARCHIVE_DIR, exist_ok=True)
+    for month in expired:
+        name = partition_name(month)
+        path = os.path.join(ARCHIVE_DIR, f"{name}.csv.gz")
+        logger.info(f"Archiving {name} to {path}")
+        if dry_run:
+            continue
+
+        with engine.begin() as conn:
+            # Once detached, new queries no longer see the month and it can be dumped at leisure
+            conn.execute(text(f"ALTER TABLE coupon_uses DETACH PARTITION {name}"))
+
+        with engine.connect() as conn:
+            written = export_table(conn, name, path)
+            expected = conn.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+        if written != expected:
+            raise RuntimeError(f"Archive of {name} wrote {written} rows, expected {expected}; partition kept")
+
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE {name}"))
+        logger.info(f"Archived {written} rows from {name}")
+
+def export_table(conn, table: str, path: str) -> int:
+    """Stream a table to gzip CSV without loading it into memory"""
+    tmp_path = f"{path}.tmp"
+    written = 0
+    result = conn.execution_options(stream_results=True, yield_per=5000).execute(
+        text(f"SELECT {', '.join(COLUMNS)} FROM {table} ORDER BY used_at, id")
+    )
+    with gzip.open(tmp_path, "wt", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for row in result:
+            writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+            written += 1
+    os.replace(tmp_path, path)
+    return written
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    parser = argparse.ArgumentParser(description="Maintain and archive coupon_uses partitions")
+    parser.add_argument("command", choices=("maintain", "archive", "all"), nargs="?", default="all")
+    parser.add_argument("--dry-run", action="store_true", help="Log what would change without changing it")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        logger.info(f"Partitioning is only used on PostgreSQL (database is {engine.dialect.name})")
+        return
+
+    if args.command in ("maintain", "all"):
+        maintain(args.dry_run)
+    if args.command in ("archive", "all"):
+        archive(args.dry_run)
+
+if __name__ == "__main__":
+    main()